@@ -1,40 +1,52 @@
 #Aurora Cloud BG Remover - Professional Background Removal Tool
 #By hash&ke
 
-import subprocess
+import time
+
+# Process start, for the startup timings of --startup-probe
+STARTED = time.perf_counter()
+
+import importlib.util
+import json
 import sys
 import os
-import io
 import threading
 import random
+import itertools
+from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime
 
-# Auto-install required packages
-def install_requirements():
-    packages = ['rembg[gpu]', 'pillow', 'numpy']
-    print("🔧 Installing required packages (this may take a moment)...")
-    for package in packages:
-        try:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', package, '-q'])
-        except:
-            pass
-    print("✅ Packages installed!\n")
+# Module -> pip package the app needs. find_spec only looks the packages up
+# without importing them, so the check costs milliseconds.
+REQUIREMENTS = {'PIL': 'pillow', 'numpy': 'numpy', 'rembg': 'rembg', 'onnxruntime': 'onnxruntime'}
+
 
-# Try to import, install if needed
-try:
-    from rembg import remove, new_session
-    from PIL import Image, ImageTk, ImageDraw, ImageFilter, ImageEnhance
-    import tkinter as tk
-    from tkinter import filedialog, ttk, messagebox
-    import numpy as np
-except ImportError:
-    install_requirements()
-    from rembg import remove, new_session
-    from PIL import Image, ImageTk, ImageDraw, ImageFilter, ImageEnhance
-    import tkinter as tk
-    from tkinter import filedialog, ttk, messagebox
-    import numpy as np
+def missing_requirements():
+    """pip names of the required packages that are not installed"""
+    return [package for module, package in REQUIREMENTS.items()
+            if importlib.util.find_spec(module) is None]
+
+
+MISSING_PACKAGES = missing_requirements()
+if 'pillow' in MISSING_PACKAGES or 'numpy' in MISSING_PACKAGES:
+    # The window itself needs these two, the AI packages are only checked once it is up
+    print(f"❌ Missing packages: {', '.join(MISSING_PACKAGES)}\n"
+          f"   Install them with: {sys.executable} -m pip install {' '.join(MISSING_PACKAGES)}")
+    sys.exit(1)
+
+# Only light modules here: rembg, ONNX Runtime and scipy are imported by the
+# background warm-up once the window is showing (see start_warm_up)
+from PIL import Image, ImageTk
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+from aurora import core, metrics, preview, tiled
+from aurora.autocrop import ASPECTS, crop_options
+from aurora.batch import BatchControl, BatchSettings, default_workers, iter_batch
+from aurora.manifest import BatchManifest
+from aurora.watch import WatchStats, watch_folder
+from aurora.sessions import SessionCache
+from aurora.result_cache import ResultCache, cache_key
+from aurora.runtime import GRAPH_OPTIMIZATIONS, RuntimeOptions
 
 
 class ModernButton(tk.Canvas):
@@ -94,6 +106,11 @@ class ModernButton(tk.Canvas):
             self.after(50, lambda: self.draw_button(self.bg_color))
             self.command()
             
+    def set_text(self, text, icon=""):
+        self.text = text
+        self.icon = icon
+        self.set_state(self.enabled)
+        
     def set_state(self, enabled):
         self.enabled = enabled
         if enabled:
@@ -103,6 +120,42 @@ class ModernButton(tk.Canvas):
             self.config(cursor='')
 
 
+class UIEventQueue:
+    """Thread-safe queue of UI updates, applied on the Tk thread by one periodic after() callback
+    
+    Worker threads post callables here instead of touching widgets. Updates
+    posted with the same key replace each other while pending, so a burst of
+    status or progress changes costs one widget update per frame.
+    """
+    def __init__(self, root, interval_ms=16):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()   # key -> (callable, args)
+        self._ids = itertools.count()
+        self.root.after(self.interval_ms, self._drain)
+        
+    def post(self, func, *args, key=None):
+        """Run func(*args) on the Tk thread; a keyed update supersedes a pending one"""
+        with self._lock:
+            if key is None:
+                key = next(self._ids)
+            else:
+                self._pending.pop(key, None)
+            self._pending[key] = (func, args)
+            
+    def _drain(self):
+        # Reschedule first: a message box opened below runs its own event loop
+        self.root.after(self.interval_ms, self._drain)
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+        for func, args in pending.values():
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"UI update failed: {e}")
+
+
 class AuroraCloudBGRemover:
     def __init__(self, root):
         self.root = root
@@ -120,22 +173,48 @@ class AuroraCloudBGRemover:
         self.input_path = None
         self.output_path = None
         self.selected_format = tk.StringVar(value="png")
+        self.encoder_profile = tk.StringVar(value=core.DEFAULT_ENCODER_PROFILE)
         self.selected_model = tk.StringVar(value="u2net")
-        self.original_image = None
         self.processed_image = None
-        self.session = None
+        self.sessions = SessionCache()
+        self.results = ResultCache()
+        # (input path, mtime, model, proxy size, upright image, raw AI mask) of the last inference
+        self.mask_cache = None
         self.processing_time = 0
         
         # Enhancement options
         self.enhance_edges = tk.BooleanVar(value=True)
         self.auto_crop = tk.BooleanVar(value=False)
+        # Shape of the auto-crop, an autocrop.ASPECTS label
+        self.crop_aspect = tk.StringVar(value="Tight")
         self.quality_level = tk.StringVar(value="Ultra")
+        self.proxy_size = tk.StringVar(value="Off")
+        self.batch_workers = tk.IntVar(value=default_workers())
+        # ONNX Runtime threads per model session ("Auto" lets it take every core)
+        self.session_threads = tk.StringVar(value="Auto")
+        self.graph_optimization = tk.StringVar(value="all")
         
         # Statistics
         self.images_processed = 0
-        self.current_model = None
+        
+        # Pause/cancel switch of the running batch, None when idle
+        self.batch_control = None
         
         self.setup_ui()
+        self.ui = UIEventQueue(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Re-apply quality/edge/crop changes straight away once the AI mask is cached
+        for var in (self.quality_level, self.enhance_edges, self.auto_crop, self.crop_aspect):
+            var.trace_add('write', self._retune)
+        # New runtime options take effect from the next model load
+        for var in (self.session_threads, self.graph_optimization):
+            var.trace_add('write', self._apply_runtime)
+        
+        # Set once the AI libraries are imported and the default model is loaded
+        self.engine_ready = threading.Event()
+        # Warm up after the first frame is drawn, so the window shows at once
+        self.root.after_idle(self.start_warm_up)
         
     def setup_ui(self):
         # Animated gradient background
@@ -286,16 +365,12 @@ class AuroraCloudBGRemover:
                        arrowcolor='#00ffff',
                        borderwidth=0)
         
-        models = [
-            "u2net - Ultra Accurate (Recommended)",
-            "u2netp - Fast & Efficient",
-            "silueta - Optimized for People"
-        ]
+        models = [core.model_label(name) for name in core.MODELS]
         
         self.model_combo = ttk.Combobox(model_container, 
                                        textvariable=self.selected_model,
                                        values=models, state='readonly',
-                                       width=32, font=('Segoe UI', 9),
+                                       width=38, font=('Segoe UI', 9),
                                        style='Custom.TCombobox')
         self.model_combo.set(models[0])
         self.model_combo.pack(side='left', padx=8, pady=8)
@@ -311,12 +386,20 @@ class AuroraCloudBGRemover:
         
         format_combo = ttk.Combobox(format_container,
                                    textvariable=self.selected_format,
-                                   values=["png", "jpg", "jpeg", "webp", "bmp", "tiff"],
+                                   values=core.OUTPUT_FORMATS,
                                    state='readonly', width=12,
                                    font=('Segoe UI', 9),
                                    style='Custom.TCombobox')
         format_combo.pack(side='left', padx=8, pady=8)
         
+        profile_combo = ttk.Combobox(format_container,
+                                    textvariable=self.encoder_profile,
+                                    values=list(core.ENCODER_PROFILES),
+                                    state='readonly', width=9,
+                                    font=('Segoe UI', 9),
+                                    style='Custom.TCombobox')
+        profile_combo.pack(side='left', padx=(0, 8), pady=8)
+        
         # Quality Selection
         quality_container = tk.Frame(settings_inner, bg='#1a0a2a',
                                     highlightthickness=1, highlightbackground='#6600ff')
@@ -328,13 +411,25 @@ class AuroraCloudBGRemover:
         
         quality_combo = ttk.Combobox(quality_container,
                                     textvariable=self.quality_level,
-                                    values=["Standard", "High", "Ultra"],
+                                    values=list(core.QUALITY_PRESETS),
                                     state='readonly', width=10,
                                     font=('Segoe UI', 9),
                                     style='Custom.TCombobox')
         quality_combo.set("Ultra")
         quality_combo.pack(side='left', padx=8, pady=8)
         
+        tk.Label(quality_container, text="Proxy:",
+                font=('Segoe UI', 9),
+                bg='#1a0a2a', fg='#ffffff').pack(side='left', padx=(4, 2))
+        
+        proxy_combo = ttk.Combobox(quality_container,
+                                  textvariable=self.proxy_size,
+                                  values=["Off", "768", "1024", "1536", "2048"],
+                                  state='readonly', width=5,
+                                  font=('Segoe UI', 9),
+                                  style='Custom.TCombobox')
+        proxy_combo.pack(side='left', padx=(0, 8), pady=8)
+        
         # Enhancement Options
         enhance_container = tk.Frame(settings_inner, bg='#1a0a2a',
                                     highlightthickness=1, highlightbackground='#6600ff')
@@ -362,6 +457,50 @@ class AuroraCloudBGRemover:
                                    activeforeground='#00ff88')
         crop_check.pack(side='left', padx=5)
         
+        aspect_combo = ttk.Combobox(enhance_container,
+                                   textvariable=self.crop_aspect,
+                                   values=list(ASPECTS),
+                                   state='readonly', width=5,
+                                   font=('Segoe UI', 9),
+                                   style='Custom.TCombobox')
+        aspect_combo.pack(side='left', padx=(0, 5))
+        
+        tk.Label(enhance_container, text="Batch Workers:",
+                font=('Segoe UI', 9),
+                bg='#1a0a2a', fg='#ffffff').pack(side='left', padx=(10, 2))
+        
+        workers_spin = tk.Spinbox(enhance_container, from_=1, to=os.cpu_count() or 1,
+                                 textvariable=self.batch_workers, width=3,
+                                 font=('Segoe UI', 9), state='readonly',
+                                 readonlybackground='#0a0015', fg='#ffffff',
+                                 buttonbackground='#6600ff')
+        workers_spin.pack(side='left', padx=(0, 8))
+        
+        tk.Label(enhance_container, text="AI Threads:",
+                font=('Segoe UI', 9),
+                bg='#1a0a2a', fg='#ffffff').pack(side='left', padx=(4, 2))
+        
+        thread_counts = [str(n) for n in range(1, (os.cpu_count() or 1) + 1)]
+        threads_combo = ttk.Combobox(enhance_container,
+                                    textvariable=self.session_threads,
+                                    values=["Auto"] + thread_counts,
+                                    state='readonly', width=5,
+                                    font=('Segoe UI', 9),
+                                    style='Custom.TCombobox')
+        threads_combo.pack(side='left', padx=(0, 8), pady=8)
+        
+        tk.Label(enhance_container, text="Graph Opt:",
+                font=('Segoe UI', 9),
+                bg='#1a0a2a', fg='#ffffff').pack(side='left', padx=(4, 2))
+        
+        graph_combo = ttk.Combobox(enhance_container,
+                                  textvariable=self.graph_optimization,
+                                  values=list(GRAPH_OPTIMIZATIONS),
+                                  state='readonly', width=8,
+                                  font=('Segoe UI', 9),
+                                  style='Custom.TCombobox')
+        graph_combo.pack(side='left', padx=(0, 8), pady=8)
+        
         # Action Buttons Row
         buttons_frame = tk.Frame(controls_container, bg='#2a1a4a')
         buttons_frame.pack(pady=15)
@@ -388,6 +527,13 @@ class AuroraCloudBGRemover:
                                      width=200, height=50, icon="📦")
         self.batch_btn.pack(side='left', padx=8)
         
+        # Watch Folder Button
+        self.watch_btn = ModernButton(buttons_frame, "WATCH",
+                                     self.start_watch,
+                                     '#3366ff', '#2244dd', '#ffffff',
+                                     width=150, height=50, icon="👀")
+        self.watch_btn.pack(side='left', padx=8)
+        
         # Download Button
         self.download_btn = ModernButton(buttons_frame, "DOWNLOAD",
                                         self.download_image,
@@ -396,6 +542,21 @@ class AuroraCloudBGRemover:
         self.download_btn.set_state(False)
         self.download_btn.pack(side='left', padx=8)
         
+        # Batch controls, shown while a batch runs
+        self.batch_controls = tk.Frame(controls_container, bg='#2a1a4a')
+        
+        self.pause_btn = ModernButton(self.batch_controls, "PAUSE",
+                                     self.toggle_pause,
+                                     '#ffaa00', '#dd8800', '#000000',
+                                     width=160, height=44, icon="⏸️")
+        self.pause_btn.pack(side='left', padx=8)
+        
+        self.cancel_btn = ModernButton(self.batch_controls, "CANCEL",
+                                      self.cancel_batch,
+                                      '#ff3366', '#dd1144', '#ffffff',
+                                      width=160, height=44, icon="⏹️")
+        self.cancel_btn.pack(side='left', padx=8)
+        
         # ===== STATUS BAR =====
         status_container = tk.Frame(main_container, bg='#1a0033')
         status_container.pack(pady=10, fill='x', padx=40)
@@ -426,7 +587,19 @@ class AuroraCloudBGRemover:
                                     text="📊 Images Processed: 0 | ⚡ Last Process Time: --",
                                     font=('Segoe UI', 9),
                                     bg='#1a0033', fg='#6666aa')
-        self.stats_label.pack()
+        self.stats_label.pack(side='left')
+        
+        clear_cache = tk.Label(stats_frame, text="🗑️ Clear Cache",
+                              font=('Segoe UI', 9, 'underline'),
+                              bg='#1a0033', fg='#9999ff', cursor='hand2')
+        clear_cache.pack(side='left', padx=(12, 0))
+        clear_cache.bind('<Button-1>', lambda e: self.clear_result_cache())
+        
+        export_metrics = tk.Label(stats_frame, text="📈 Export Metrics",
+                                  font=('Segoe UI', 9, 'underline'),
+                                  bg='#1a0033', fg='#9999ff', cursor='hand2')
+        export_metrics.pack(side='left', padx=(12, 0))
+        export_metrics.bind('<Button-1>', lambda e: self.export_metrics())
         
         # ===== FOOTER =====
         footer_frame = tk.Frame(self.root, bg=self.bg_start)
@@ -442,26 +615,6 @@ class AuroraCloudBGRemover:
                 font=('Segoe UI', 8),
                 bg=self.bg_start, fg='#444466').pack()
         
-    def create_checkered_bg(self, width, height):
-        """Create checkered background for transparency"""
-        img = Image.new('RGB', (width, height), '#0a0015')
-        draw = ImageDraw.Draw(img)
-        square_size = 15
-        
-        for y in range(0, height, square_size):
-            for x in range(0, width, square_size):
-                if (x // square_size + y // square_size) % 2 == 0:
-                    draw.rectangle([x, y, x + square_size, y + square_size],
-                                 fill='#1a0a2a')
-        return img
-        
-    def resize_image_for_preview(self, image, max_width=520, max_height=300):
-        """Resize maintaining aspect ratio"""
-        ratio = min(max_width / image.width, max_height / image.height)
-        new_width = int(image.width * ratio)
-        new_height = int(image.height * ratio)
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
     def select_file(self):
         filetypes = (
             ("All Images", "*.png *.jpg *.jpeg *.webp *.bmp *.tiff *.gif"),
@@ -477,18 +630,19 @@ class AuroraCloudBGRemover:
         
         if filename:
             self.input_path = filename
+            self.mask_cache = None
             
             try:
-                self.original_image = Image.open(filename)
-                preview = self.resize_image_for_preview(self.original_image)
-                photo = ImageTk.PhotoImage(preview)
+                # Only a thumbnail for now, the full decode waits until processing
+                thumbnail, (width, height), mode = preview.load_preview(filename)
+                photo = ImageTk.PhotoImage(thumbnail)
                 
                 self.original_canvas.configure(image=photo, text='')
                 self.original_canvas.image = photo
                 
                 # Show image info
                 size_mb = os.path.getsize(filename) / (1024 * 1024)
-                info_text = f"{self.original_image.width}x{self.original_image.height} • {size_mb:.2f}MB • {self.original_image.mode}"
+                info_text = f"{width}x{height} • {size_mb:.2f}MB • {mode}"
                 self.original_info.config(text=info_text)
                 
                 self.status_label.config(text=f"✅ Loaded: {Path(filename).name} • Ready to process!", 
@@ -514,126 +668,223 @@ class AuroraCloudBGRemover:
         self.process_btn.set_state(False)
         self.upload_btn.set_state(False)
         self.batch_btn.set_state(False)
+        self.watch_btn.set_state(False)
         
         self.status_label.config(text="🚀 Initializing Aurora Cloud AI Processing...", fg='#ffff00')
         self.progress.pack(pady=8)
         self.progress.start(8)
-        self.root.update()
+        
+        # Settings are read here: the worker thread must not touch Tk
+        options = (self.input_path, core.model_from_label(self.selected_model.get()),
+                   self.quality_level.get(), self.enhance_edges.get(), self.auto_crop.get(),
+                   self.get_crop_aspect(), self.get_proxy_size())
         
         # Process in thread
-        thread = threading.Thread(target=self._process_thread)
+        thread = threading.Thread(target=self._process_thread, args=options)
         thread.start()
         
-    def _process_thread(self):
-        start_time = datetime.now()
+    def set_status(self, text, color='#ffff00'):
+        """Show a status line, from any thread"""
+        self.ui.post(lambda: self.status_label.config(text=text, fg=color), key='status')
         
-        try:
-            model_name = self.selected_model.get().split(' - ')[0]
-            
-            # Load AI model
-            if self.session is None or model_name != self.current_model:
-                self.status_label.config(text=f"🧠 Loading {model_name} AI Neural Network...", 
-                                       fg='#ffff00')
-                self.root.update()
-                self.session = new_session(model_name)
-                self.current_model = model_name
-            
-            # Read image
-            with open(self.input_path, 'rb') as f:
-                input_data = f.read()
+    def set_stats(self, text):
+        """Show the statistics line, from any thread"""
+        self.ui.post(lambda: self.stats_label.config(text=text), key='stats')
+        
+    def _process_thread(self, input_path, model_name, quality, enhance_edges, auto_crop,
+                        crop_aspect, proxy_size):
+        start_time = time.perf_counter()
+        # Matting a huge image at full size would run out of memory; use the
+        # batch large-image mode's proxy for its mask and matting instead
+        if not proxy_size and tiled.is_large(input_path):
+            proxy_size = tiled.LARGE_PROXY_SIZE
+        
+        # Per-stage timings of this image, recorded on this thread by aurora.core
+        with metrics.capture() as timings:
+            try:
+                # Read image
+                input_data = core.read_file(input_path)
             
-            self.status_label.config(text="✨ AI Analyzing Image & Removing Background...",
-                                   fg='#ffff00')
-            self.root.update()
+                # Same image with the same settings seen before? Skip the AI entirely
+                key = cache_key(input_data, model_name, quality, enhance_edges, auto_crop, proxy_size,
+                                crop_options(aspect=crop_aspect))
+                processed_image = self.results.get(key)
             
-            # Quality settings based on selection
-            quality = self.quality_level.get()
-            if quality == "Ultra":
-                alpha_settings = {
-                    'alpha_matting': True,
-                    'alpha_matting_foreground_threshold': 240,
-                    'alpha_matting_background_threshold': 10,
-                    'alpha_matting_erode_size': 10
-                }
-            elif quality == "High":
-                alpha_settings = {
-                    'alpha_matting': True,
-                    'alpha_matting_foreground_threshold': 230,
-                    'alpha_matting_background_threshold': 15,
-                    'alpha_matting_erode_size': 8
-                }
-            else:
-                alpha_settings = {'alpha_matting': False}
+                if processed_image is None:
+                    mask_key = (input_path, os.path.getmtime(input_path), model_name, proxy_size)
+                
+                    if self.mask_cache is not None and self.mask_cache[:4] == mask_key:
+                        # Only settings downstream of the AI changed: re-use its mask
+                        input_image, mask = self.mask_cache[4:]
+                        self.set_status("♻️ Re-using AI Mask • Applying New Settings...")
+                    else:
+                        # Load AI model
+                        if model_name not in self.sessions:
+                            self.set_status(f"🧠 Loading {model_name} AI Neural Network...")
+                        session = self.sessions.get(model_name)
+                    
+                        self.set_status("✨ AI Analyzing Image & Removing Background...")
+                    
+                        input_image = core.decode_image(input_data, input_path)
+                        mask = core.predict_mask(input_image, session, proxy_size)
+                        self.mask_cache = mask_key + (input_image, mask)
+                
+                    # Cut out with the selected quality settings
+                    processed_image = core.cut_out(input_image, mask, quality)
+                
+                    # Apply enhancements
+                    if enhance_edges:
+                        self.set_status("🎨 Enhancing Edges for Professional Quality...")
+                        processed_image = core.enhance_edges(processed_image)
+                
+                    if auto_crop:
+                        self.set_status("✂️ Auto-Cropping to Content...")
+                        processed_image = core.auto_crop_image(processed_image, aspect=crop_aspect)
+                
+                    self.results.put(key, processed_image)
             
-            # Remove background
-            output_data = remove(input_data, session=self.session, **alpha_settings)
+                # Preview over a checkerboard, turned into a PhotoImage on the Tk thread
+                thumbnail = preview.composite_preview(processed_image)
             
-            self.processed_image = Image.open(io.BytesIO(output_data))
+                # Calculate processing time
+                self.ui.post(self._show_result, processed_image, thumbnail,
+                             time.perf_counter() - start_time, list(timings))
+                
+            except Exception as e:
+                self.set_status(f"❌ Processing Error: {str(e)}", '#ff0000')
+                self.ui.post(messagebox.showerror, "Processing Error", f"An error occurred:\n{str(e)}")
+        
+            finally:
+                self.ui.post(self._processing_done)
             
-            # Apply enhancements
-            if self.enhance_edges.get():
-                self.status_label.config(text="🎨 Enhancing Edges for Professional Quality...",
-                                       fg='#ffff00')
-                self.root.update()
-                self.processed_image = self.processed_image.filter(
-                    ImageFilter.UnsharpMask(radius=2, percent=150, threshold=3)
-                )
+    def _show_result(self, processed_image, thumbnail, processing_time, timings):
+        self.processed_image = processed_image
+        self.processing_time = processing_time
+        self.images_processed += 1
+        
+        photo = ImageTk.PhotoImage(thumbnail)
+        self.processed_canvas.configure(image=photo, text='')
+        self.processed_canvas.image = photo
+        
+        # Show processed image info
+        info_text = f"{processed_image.width}x{processed_image.height} • Transparent Background"
+        self.processed_info.config(text=info_text)
+        
+        self.status_label.config(
+            text=f"✨ Success! Background Removed Perfectly in {processing_time:.2f}s",
+            fg='#00ff88'
+        )
+        
+        self.stats_label.config(
+            text=f"📊 Images Processed: {self.images_processed} | ⚡ Last Process Time: {processing_time:.2f}s | "
+                 f"⏱️ {metrics.format_timings(timings)} | "
+                 f"{self.sessions.stats_text()} | {self.results.stats_text()}"
+        )
+        
+        self.download_btn.set_state(True)
+        
+    def _processing_done(self):
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.process_btn.set_state(True)
+        self.upload_btn.set_state(True)
+        self.batch_btn.set_state(True)
+        self.watch_btn.set_state(True)
             
-            if self.auto_crop.get():
-                self.status_label.config(text="✂️ Auto-Cropping to Content...",
-                                       fg='#ffff00')
-                self.root.update()
-                self.processed_image = self.auto_crop_image(self.processed_image)
+    def start_warm_up(self):
+        """Import the AI libraries and load the default model on a background thread"""
+        if MISSING_PACKAGES:
+            self.status_label.config(
+                text=f"❌ Missing packages: {', '.join(MISSING_PACKAGES)} • "
+                     f"pip install {' '.join(MISSING_PACKAGES)}", fg='#ff4444')
+            self.batch_btn.set_state(False)
+            self.watch_btn.set_state(False)
+            return
+        model = core.model_from_label(self.selected_model.get())
+        threading.Thread(target=self._warm_up_thread, args=(model,), daemon=True).start()
             
-            # Create preview
-            preview = self.resize_image_for_preview(self.processed_image)
-            checkered = self.create_checkered_bg(preview.width, preview.height)
-            checkered.paste(preview, (0, 0), preview if preview.mode == 'RGBA' else None)
+    def _warm_up_thread(self, model):
+        start = time.perf_counter()
+        try:
+            core.import_engine()
+            self.sessions.get(model)
+        except Exception as e:
+            self.set_status(f"❌ Could not load the AI engine: {e}", '#ff4444')
+            return
+        self.engine_ready.set()
+        self.set_status(f"🧠 AI engine ready • {model} loaded in "
+                        f"{time.perf_counter() - start:.1f}s in the background", '#00ff88')
             
-            photo = ImageTk.PhotoImage(checkered)
-            self.processed_canvas.configure(image=photo, text='')
-            self.processed_canvas.image = photo
+    def run_startup_probe(self):
+        """Print startup timings as JSON and quit, for benchmarks.startup"""
+        timings = {}
+        
+        def first_frame():
+            timings['first_frame'] = time.perf_counter() - STARTED
+            threading.Thread(target=wait_for_engine, daemon=True).start()
+        
+        def wait_for_engine():
+            self.engine_ready.wait()
+            timings['engine_ready'] = time.perf_counter() - STARTED
+            session = self.sessions.get(core.model_from_label(self.selected_model.get()))
+            core.predict_mask(Image.new('RGB', (640, 480), (90, 120, 200)), session)
+            timings['first_inference'] = time.perf_counter() - STARTED
+            print(json.dumps(timings), flush=True)
+            self.ui.post(self.root.destroy)
+        
+        self.root.update()
+        first_frame()
             
-            # Show processed image info
-            info_text = f"{self.processed_image.width}x{self.processed_image.height} • Transparent Background"
-            self.processed_info.config(text=info_text)
+    def get_proxy_size(self):
+        """Proxy resolution picked in the UI, None when off"""
+        value = self.proxy_size.get()
+        return None if value == "Off" else int(value)
             
-            # Calculate processing time
-            end_time = datetime.now()
-            self.processing_time = (end_time - start_time).total_seconds()
-            self.images_processed += 1
+    def get_crop_aspect(self):
+        """Auto-crop width / height picked in the UI, None for a tight crop"""
+        return ASPECTS[self.crop_aspect.get()]
             
-            self.status_label.config(
-                text=f"✨ Success! Background Removed Perfectly in {self.processing_time:.2f}s",
-                fg='#00ff88'
-            )
+    def get_runtime(self):
+        """ONNX Runtime options picked in the UI"""
+        threads = self.session_threads.get()
+        return RuntimeOptions(intra_threads=0 if threads == "Auto" else int(threads),
+                              graph_optimization=self.graph_optimization.get())
             
-            self.stats_label.config(
-                text=f"📊 Images Processed: {self.images_processed} | ⚡ Last Process Time: {self.processing_time:.2f}s"
-            )
+    def _apply_runtime(self, *args):
+        """Reload model sessions with the new runtime options when next used"""
+        self.sessions.set_runtime(self.get_runtime())
+        self.set_status(f"{self.get_runtime().describe()} • applies from the next run",
+                        '#00ff88')
             
-            self.download_btn.set_state(True)
-                
-        except Exception as e:
-            self.status_label.config(text=f"❌ Processing Error: {str(e)}", fg='#ff0000')
-            messagebox.showerror("Processing Error", f"An error occurred:\n{str(e)}")
-        
-        finally:
-            self.progress.stop()
-            self.progress.pack_forget()
-            self.process_btn.set_state(True)
-            self.upload_btn.set_state(True)
-            self.batch_btn.set_state(True)
+    def _retune(self, *args):
+        """Re-apply changed quality/edge/crop settings without rerunning the AI model"""
+        if (self.mask_cache is not None and self.mask_cache[0] == self.input_path
+                and self.process_btn.enabled):
+            self.process_image()
             
-    def auto_crop_image(self, img):
-        """Auto-crop to content"""
-        if img.mode != 'RGBA':
-            return img
+    def clear_result_cache(self):
+        """Delete all cached cut-outs"""
+        if not messagebox.askyesno("Clear Cache",
+                                   "Delete all cached results?\n\n"
+                                   f"📁 {self.results.directory}"):
+            return
+        self.results.clear()
+        self.status_label.config(text="🗑️ Result cache cleared", fg='#00ff88')
         
-        bbox = img.getbbox()
-        if bbox:
-            return img.crop(bbox)
-        return img
+    def export_metrics(self):
+        """Save the per-stage timings of this session as JSON, CSV or Prometheus text"""
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv"), ("Prometheus text", "*.prom")],
+            initialfile="aurora_metrics.json"
+        )
+        if not save_path:
+            return
+        try:
+            metrics.REGISTRY.export(save_path)
+            self.status_label.config(text=f"📈 Metrics saved: {Path(save_path).name}", fg='#00ff88')
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save metrics:\n{str(e)}")
         
     def download_image(self):
         if not self.processed_image:
@@ -641,7 +892,7 @@ class AuroraCloudBGRemover:
             return
         
         output_format = self.selected_format.get()
-        default_name = f"{Path(self.input_path).stem}_aurora_no_bg.{output_format}"
+        default_name = core.output_name(self.input_path, output_format)
         
         save_path = filedialog.asksaveasfilename(
             defaultextension=f".{output_format}",
@@ -654,26 +905,23 @@ class AuroraCloudBGRemover:
         
         if save_path:
             try:
-                if output_format.lower() in ['jpg', 'jpeg']:
-                    if self.processed_image.mode == 'RGBA':
-                        rgb_img = Image.new('RGB', self.processed_image.size, (255, 255, 255))
-                        rgb_img.paste(self.processed_image, 
-                                    mask=self.processed_image.split()[3])
-                        rgb_img.save(save_path, quality=100, optimize=True)
-                    else:
-                        self.processed_image.save(save_path, quality=100, optimize=True)
-                else:
-                    self.processed_image.save(save_path, optimize=True)
+                profile = self.encoder_profile.get()
+                start = time.perf_counter()
+                core.save_image(self.processed_image, save_path, output_format, profile)
+                encode_time = time.perf_counter() - start
+                size_mb = os.path.getsize(save_path) / 1e6
                 
                 self.status_label.config(
-                    text=f"💾 Image Saved: {Path(save_path).name}",
+                    text=f"💾 Image Saved: {Path(save_path).name} • {size_mb:.2f} MB "
+                         f"in {encode_time:.2f}s ({profile})",
                     fg='#00ff88'
                 )
                 
                 messagebox.showinfo("Success!", 
                     f"✨ Image saved successfully!\n\n"
                     f"📁 Location:\n{save_path}\n\n"
-                    f"⚡ Processing time: {self.processing_time:.2f}s")
+                    f"⚡ Processing time: {self.processing_time:.2f}s\n"
+                    f"📝 Encoding ({profile}): {encode_time:.2f}s • {size_mb:.2f} MB")
                     
             except Exception as e:
                 messagebox.showerror("Save Error", f"Could not save image:\n{str(e)}")
@@ -700,11 +948,32 @@ class AuroraCloudBGRemover:
         if not output_dir:
             return
         
+        settings = BatchSettings(model=core.model_from_label(self.selected_model.get()),
+                                 quality=self.quality_level.get(),
+                                 output_format=self.selected_format.get(),
+                                 encoder_profile=self.encoder_profile.get(),
+                                 auto_crop=self.auto_crop.get(),
+                                 crop_aspect=self.get_crop_aspect(),
+                                 proxy_size=self.get_proxy_size(),
+                                 runtime=self.get_runtime())
+        
+        # Files finished by an earlier, interrupted run of the same batch are skipped
+        manifest = BatchManifest(output_dir, settings)
+        pending = manifest.pending(filenames)
+        done = len(filenames) - len(pending)
+        if not pending:
+            messagebox.showinfo("Batch Processing",
+                                f"✨ All {len(filenames)} images are already processed in\n{output_dir}")
+            return
+        
         # Show batch processing dialog
+        resume_line = f"⏭️ Resuming: {done} already done\n" if done else ""
         result = messagebox.askyesno(
             "Batch Processing",
-            f"Process {len(filenames)} images?\n\n"
+            f"Process {len(pending)} images?\n\n"
+            f"{resume_line}"
             f"Quality: {self.quality_level.get()}\n"
+            f"Workers: {self.batch_workers.get()}\n"
             f"Output folder: {output_dir}"
         )
         
@@ -715,113 +984,195 @@ class AuroraCloudBGRemover:
         self.process_btn.set_state(False)
         self.upload_btn.set_state(False)
         self.batch_btn.set_state(False)
+        self.watch_btn.set_state(False)
         self.download_btn.set_state(False)
         
         # Setup progress
-        self.status_label.config(text=f"📦 Batch processing {len(filenames)} images...", fg='#ffff00')
+        self.status_label.config(text=f"📦 Batch processing {len(pending)} images...", fg='#ffff00')
         self.progress.pack(pady=8)
-        self.progress.configure(mode='determinate', maximum=len(filenames))
+        self.progress.configure(mode='determinate', maximum=len(pending))
         self.progress['value'] = 0
-        self.root.update()
+        
+        self.batch_control = BatchControl()
+        self.pause_btn.set_text("PAUSE", "⏸️")
+        self.pause_btn.set_state(True)
+        self.cancel_btn.set_state(True)
+        self.batch_controls.pack(pady=(0, 10))
         
         # Run batch in thread
-        thread = threading.Thread(target=self._batch_thread, args=(filenames, output_dir))
+        thread = threading.Thread(target=self._batch_thread,
+                                  args=(pending, output_dir, settings, self.batch_workers.get(),
+                                        manifest, self.batch_control))
         thread.start()
 
-    def _batch_thread(self, filenames, output_dir):
-        """Handle background processing for multiple files"""
-        successful = 0
-        errors = 0
+    def start_watch(self):
+        """Keep processing images dropped into a folder until stopped"""
+        input_dir = filedialog.askdirectory(title="Select the folder to watch for new images")
+        if not input_dir:
+            return
+        output_dir = filedialog.askdirectory(title="Select output folder for processed images")
+        if not output_dir:
+            return
         
-        model_name = self.selected_model.get().split(' - ')[0]
+        settings = BatchSettings(model=core.model_from_label(self.selected_model.get()),
+                                 quality=self.quality_level.get(),
+                                 output_format=self.selected_format.get(),
+                                 encoder_profile=self.encoder_profile.get(),
+                                 auto_crop=self.auto_crop.get(),
+                                 crop_aspect=self.get_crop_aspect(),
+                                 proxy_size=self.get_proxy_size(),
+                                 runtime=self.get_runtime())
         
-        # Quality settings
-        quality = self.quality_level.get()
-        if quality == "Ultra":
-            alpha_settings = {'alpha_matting': True, 'alpha_matting_foreground_threshold': 240}
-        elif quality == "High":
-            alpha_settings = {'alpha_matting': True, 'alpha_matting_foreground_threshold': 230}
+        # Disable inputs
+        self.process_btn.set_state(False)
+        self.upload_btn.set_state(False)
+        self.batch_btn.set_state(False)
+        self.watch_btn.set_state(False)
+        self.download_btn.set_state(False)
+        
+        self.status_label.config(text=f"👀 Watching {Path(input_dir).name} for new images...",
+                                 fg='#ffff00')
+        
+        self.batch_control = BatchControl()
+        self.pause_btn.set_text("PAUSE", "⏸️")
+        self.pause_btn.set_state(True)
+        self.cancel_btn.set_state(True)
+        self.batch_controls.pack(pady=(0, 10))
+        
+        thread = threading.Thread(target=self._watch_thread,
+                                  args=(input_dir, output_dir, settings, self.batch_control))
+        thread.start()
+        
+    def _watch_thread(self, input_dir, output_dir, settings, control):
+        """Feed images arriving in a folder through the batch pipeline"""
+        stats = WatchStats()
+        try:
+            for result in watch_folder(input_dir, output_dir, settings, sessions=self.sessions,
+                                       cache=self.results, control=control, stats=stats):
+                name = Path(result.file_path).name
+                if result.ok:
+                    self.set_status(f"👀 Watching • Last: {name} ({result.seconds:.2f}s)")
+                else:
+                    print(f"Error processing {result.file_path}: {result.error}")
+                    self.set_status(f"👀 Watching • ❌ {name}: {result.error}", '#ff0000')
+                self.set_stats(f"{stats.summary()} | {self.results.stats_text()}")
+            self.set_status(f"⏹️ Stopped watching • Processed: {stats.processed}, "
+                            f"Errors: {stats.errors}", '#00ff88')
+        except Exception as e:
+            self.ui.post(messagebox.showerror, "Watch Error", str(e))
+        finally:
+            self.ui.post(self._batch_done, stats.processed)
+            
+    def toggle_pause(self):
+        control = self.batch_control
+        if control is None:
+            return
+        if control.paused:
+            control.resume()
+            self.pause_btn.set_text("PAUSE", "⏸️")
+            self.status_label.config(text="▶️ Batch resumed", fg='#ffff00')
         else:
-            alpha_settings = {'alpha_matting': False}
+            control.pause()
+            self.pause_btn.set_text("RESUME", "▶️")
+            self.status_label.config(text="⏸️ Pausing after the images in progress...",
+                                     fg='#ffaa00')
+            
+    def cancel_batch(self):
+        if self.batch_control is None:
+            return
+        self.batch_control.cancel()
+        self.pause_btn.set_state(False)
+        self.cancel_btn.set_state(False)
+        self.status_label.config(text="⏹️ Cancelling after the images in progress...",
+                                 fg='#ffaa00')
+        
+    def on_close(self):
+        """Stop a running batch cleanly so its manifest is saved for resuming"""
+        if self.batch_control is not None:
+            self.batch_control.cancel()
+        self.root.destroy()
+        
+    def _batch_thread(self, filenames, output_dir, settings, workers, manifest, control):
+        """Handle background processing for multiple files"""
+        successful = 0
+        errors = 0
+        encode_seconds = 0.0
+        output_bytes = 0
         
         try:
-            # Initialize session if needed
-            if self.session is None or model_name != self.current_model:
-                self.session = new_session(model_name)
-                self.current_model = model_name
+            self.set_status(f"📦 Processing (1/{len(filenames)}): {Path(filenames[0]).name}")
             
-            for i, file_path in enumerate(filenames):
-                try:
-                    # Update status
-                    current_name = Path(file_path).name
-                    self.root.after(0, lambda t=f"📦 Processing ({i+1}/{len(filenames)}): {current_name}": 
-                                  self.status_label.config(text=t, fg='#ffff00'))
-                    
-                    # Read and process
-                    with open(file_path, 'rb') as f:
-                        input_data = f.read()
-                        
-                    output_data = remove(
-                        input_data,
-                        session=self.session,
-                        **alpha_settings
-                    )
-                    
-                    # Convert to PIL for saving logic
-                    img = Image.open(io.BytesIO(output_data))
-                    
-                    # Apply auto-crop if selected
-                    if self.auto_crop.get():
-                        img = self.auto_crop_image(img)
-                    
-                    # Save file
-                    stem = Path(file_path).stem
-                    output_format = self.selected_format.get()
-                    out_name = f"{stem}_aurora_no_bg.{output_format}"
-                    save_path = os.path.join(output_dir, out_name)
-                    
-                    if output_format.lower() in ['jpg', 'jpeg']:
-                        # Handle JPEG transparency
-                        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                        rgb_img.paste(img, mask=img.split()[3] if 'A' in img.getbands() else None)
-                        rgb_img.save(save_path, quality=100)
-                    else:
-                        img.save(save_path)
-                        
+            stage_stats = []
+            for result in iter_batch(filenames, output_dir, settings, sessions=self.sessions,
+                                     workers=workers, stage_stats=stage_stats,
+                                     cache=self.results, control=control):
+                manifest.record(result)
+                i = result.index
+                if result.ok:
                     successful += 1
-                    self.images_processed += 1
-                    
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
+                    encode_seconds += result.encode_seconds
+                    output_bytes += result.output_bytes
+                else:
+                    print(f"Error processing {result.file_path}: {result.error}")
                     errors += 1
                 
+                # Update status
+                if control.paused:
+                    self.set_status(f"⏸️ Paused after {i+1}/{len(filenames)}", '#ffaa00')
+                elif i + 1 < len(filenames):
+                    self.set_status(f"📦 Processing ({i+2}/{len(filenames)}): {Path(filenames[i+1]).name}")
+                
                 # Update progress bar
-                self.root.after(0, lambda v=i+1: self.progress.configure(value=v))
+                self.ui.post(lambda v=i + 1: self.progress.configure(value=v), key='progress')
                 
                 # Update stats
-                self.root.after(0, lambda c=self.images_processed: 
-                              self.stats_label.config(text=f"📊 Images Processed: {c}"))
+                self.set_stats(f"📊 Images Processed: {self.images_processed + successful} | "
+                               f"{self.results.stats_text()}")
             
             # Final Status
-            status_msg = f"✅ Batch Complete! Success: {successful}, Errors: {errors}"
-            self.root.after(0, lambda: self.status_label.config(text=status_msg, fg='#00ff88'))
-            self.root.after(0, lambda: messagebox.showinfo("Batch Complete", 
-                f"✨ Processing finished!\n\n"
-                f"✅ Successful: {successful}\n"
-                f"❌ Failed: {errors}\n\n"
-                f"📂 Output: {output_dir}"))
+            if control.cancelled:
+                self.set_status(f"⏹️ Batch Cancelled • Success: {successful}, Errors: {errors} • "
+                                f"Run it again to resume", '#ffaa00')
+            else:
+                self.set_status(f"✅ Batch Complete! Success: {successful}, Errors: {errors}", '#00ff88')
+            stats_msg = f"📊 Images Processed: {self.images_processed + successful} | {self.results.stats_text()}"
+            if stage_stats:
+                slowest = max(stage_stats, key=lambda st: st.busy)
+                stats_msg += f" | 🐢 Slowest Stage: {slowest.name} ({slowest.busy:.1f}s busy)"
+            inference = metrics.REGISTRY.snapshot()['stages'].get('inference')
+            if inference:
+                stats_msg += f" | ⏱️ Inference p95: {inference['p95_seconds']:.2f}s"
+            if successful:
+                stats_msg += (f" | 📝 {settings.encoder_profile}: "
+                              f"{encode_seconds / successful:.2f}s • "
+                              f"{output_bytes / successful / 1e6:.2f} MB per image")
+            self.set_stats(stats_msg)
+            if not control.cancelled:
+                self.ui.post(messagebox.showinfo, "Batch Complete",
+                    f"✨ Processing finished!\n\n"
+                    f"✅ Successful: {successful}\n"
+                    f"❌ Failed: {errors}\n\n"
+                    f"📂 Output: {output_dir}")
                 
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Batch Error", str(e)))
+            self.ui.post(messagebox.showerror, "Batch Error", str(e))
             
         finally:
+            manifest.save()
             # Reset UI
-            self.root.after(0, lambda: self.progress.stop())
-            self.root.after(0, lambda: self.progress.pack_forget())
-            self.root.after(0, lambda: self.process_btn.set_state(True))
-            self.root.after(0, lambda: self.upload_btn.set_state(True))
-            self.root.after(0, lambda: self.batch_btn.set_state(True))
-            self.root.after(0, lambda: self.progress.configure(mode='indeterminate'))
+            self.ui.post(self._batch_done, successful)
+            
+    def _batch_done(self, successful):
+        self.images_processed += successful
+        self.batch_control = None
+        self.batch_controls.pack_forget()
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.process_btn.set_state(True)
+        self.upload_btn.set_state(True)
+        self.batch_btn.set_state(True)
+        self.watch_btn.set_state(True)
+        self.progress.configure(mode='indeterminate')
 
 
 if __name__ == "__main__":
@@ -834,5 +1185,7 @@ if __name__ == "__main__":
 
     root = tk.Tk()
     app = AuroraCloudBGRemover(root)
+    if '--startup-probe' in sys.argv:
+        app.run_startup_probe()
 
     root.mainloop()
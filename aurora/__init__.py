@@ -0,0 +1,15 @@
+"""Aurora Cloud BG Remover - processing core shared by the desktop app and the CLI
+
+Run `python -m aurora --help` for the headless command line.
+"""
+
+import os
+import sys
+
+# pymatting's numba kernels start numba's thread pool as they are imported,
+# which the app's warm-up and the batch, watch and server threads do off the
+# main thread. Started there, the TBB threading layer keeps the interpreter
+# from ever exiting; OpenMP is thread-safe as well and doesn't. macOS builds
+# may come without OpenMP, so numba keeps its own pick there.
+if sys.platform != 'darwin':
+    os.environ.setdefault('NUMBA_THREADING_LAYER', 'omp')
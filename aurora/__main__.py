@@ -0,0 +1,378 @@
+"""Headless command line: python -m aurora batch --model u2netp --quality High --format webp in/ out/
+
+`python -m aurora watch in/ out/` keeps processing images as they are dropped into in/,
+`python -m aurora serve` answers POST /remove requests over HTTP.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from . import core, server
+from .autocrop import DEFAULT_THRESHOLD, parse_aspect
+from .batch import (DEFAULT_WRITERS, BatchControl, BatchSettings, default_workers, iter_batch,
+                    list_images)
+from .inference import supports_batches
+from .manifest import BatchManifest
+from .metrics import REGISTRY
+from .result_cache import DEFAULT_LIMIT_MB, ResultCache
+from .runtime import GRAPH_OPTIMIZATIONS, RuntimeOptions
+from .sessions import SessionCache
+from .tiled import LARGE_IMAGE_PIXELS
+from .watch import DEFAULT_INTERVAL, DEFAULT_SETTLE, WatchStats, watch_folder
+
+
+# Options the single-worker pipeline honours and worker processes don't
+SINGLE_WORKER_OPTIONS = ("--batch-size", "--writers", "--memory-mb")
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache-dir", help="result cache folder (default: ~/.cache/aurora/results)")
+    parser.add_argument("--cache-limit-mb", type=float, default=DEFAULT_LIMIT_MB,
+                        help="result cache size cap (default: %(default)s)")
+
+
+def add_runtime_arguments(parser):
+    parser.add_argument("--threads", type=int, default=0,
+                        help="ONNX Runtime threads per model session (default: 0, "
+                             "automatic; with several workers the cores are split)")
+    parser.add_argument("--inter-threads", type=int, default=0,
+                        help="threads for running graph branches in parallel "
+                             "(default: 0, automatic)")
+    parser.add_argument("--graph-opt", default="all", choices=list(GRAPH_OPTIMIZATIONS),
+                        help="ONNX Runtime graph optimization level (default: %(default)s)")
+    parser.add_argument("--parallel-graph", action="store_true",
+                        help="run independent graph branches at the same time")
+    parser.add_argument("--no-arena", action="store_true",
+                        help="disable the CPU memory arena: lower memory held between "
+                             "runs, slightly slower")
+
+
+def runtime_from_args(args):
+    return RuntimeOptions(intra_threads=max(0, args.threads),
+                          inter_threads=max(0, args.inter_threads),
+                          graph_optimization=args.graph_opt, parallel=args.parallel_graph,
+                          cpu_arena=not args.no_arena)
+
+
+def add_processing_arguments(parser, workers):
+    parser.add_argument("--model", default="u2net", choices=list(core.MODELS))
+    parser.add_argument("--quality", default="Ultra", choices=list(core.QUALITY_PRESETS))
+    parser.add_argument("--format", dest="output_format", default="png",
+                        choices=core.OUTPUT_FORMATS)
+    parser.add_argument("--encoder", dest="encoder_profile", default=core.DEFAULT_ENCODER_PROFILE,
+                        choices=list(core.ENCODER_PROFILES),
+                        help="encoder settings for the output format: fast, balanced or "
+                             "smallest files (default: %(default)s)")
+    parser.add_argument("--writers", type=int, default=None,
+                        help=f"threads encoding outputs when using a single worker "
+                             f"(default: {DEFAULT_WRITERS})")
+    parser.add_argument("--auto-crop", action="store_true", help="crop to the detected subject")
+    parser.add_argument("--crop-threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help="with --auto-crop, alpha (0-255) at or below which a pixel counts "
+                             "as background (default: %(default)s)")
+    parser.add_argument("--crop-padding", type=int, default=0, metavar="PX",
+                        help="with --auto-crop, margin kept around the subject (default: 0)")
+    parser.add_argument("--crop-aspect", type=parse_aspect, default=None, metavar="W:H",
+                        help="with --auto-crop, grow the crop to this shape, e.g. 1:1 for "
+                             "square product shots (default: the subject's own)")
+    parser.add_argument("--enhance-edges", action="store_true", help="sharpen cut-out edges")
+    parser.add_argument("--proxy", dest="proxy_size", type=int, default=0, metavar="SIZE",
+                        help="run the model and matting on a copy scaled to SIZE px on the "
+                             "longest side, then upsample the mask (default: 0, full size)")
+    parser.add_argument("--large-mp", type=float, default=LARGE_IMAGE_PIXELS / 1e6,
+                        help="images above this many megapixels are cut out strip by strip "
+                             "from a proxy mask, keeping memory bounded (default: %(default)s, "
+                             "0 to turn off)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="images stacked into one model run when using a single worker "
+                             "(default: %(default)s)")
+    parser.add_argument("--memory-mb", type=float, default=0,
+                        help="with a single worker, hold back new images while the process "
+                             "uses more than this much memory (default: 0, no cap)")
+    # Left as None so workers_from_args can tell whether it was given
+    alone = f", or 1 with {', '.join(SINGLE_WORKER_OPTIONS)}" if workers > 1 else ""
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"worker processes, each with its own model session "
+                             f"(default: {workers}{alone})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always run the model, don't read or write the result cache")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write per-stage timings to FILE: JSON, or CSV / Prometheus text "
+                             "for .csv / .prom")
+    add_runtime_arguments(parser)
+    add_cache_arguments(parser)
+
+
+def single_worker_options(args):
+    """The options given that only the single-worker pipeline honours"""
+    given = {"--batch-size": args.batch_size > 1, "--writers": args.writers is not None,
+             "--memory-mb": args.memory_mb > 0}
+    return [option for option in SINGLE_WORKER_OPTIONS if given[option]]
+
+
+def workers_from_args(args, default):
+    """--workers, or default: 1 when a single-worker option is given without --workers"""
+    if args.workers is not None:
+        return max(1, args.workers)
+    return 1 if single_worker_options(args) else default
+
+
+def warn_single_worker_options(args, workers):
+    """Say up front which options several workers will ignore"""
+    options = single_worker_options(args)
+    if workers > 1 and options:
+        print(f"⚠️ Ignored with {workers} workers, single worker only: {', '.join(options)} "
+              f"(leave out --workers, or use --workers 1)", file=sys.stderr)
+
+
+def settings_from_args(args):
+    return BatchSettings(model=args.model, quality=args.quality,
+                         output_format=args.output_format,
+                         auto_crop=args.auto_crop, enhance_edges=args.enhance_edges,
+                         crop_threshold=args.crop_threshold,
+                         crop_padding=max(0, args.crop_padding), crop_aspect=args.crop_aspect,
+                         proxy_size=args.proxy_size or None,
+                         batch_size=max(1, args.batch_size),
+                         runtime=runtime_from_args(args),
+                         large_image_pixels=int(args.large_mp * 1e6),
+                         encoder_profile=args.encoder_profile,
+                         writers=max(1, args.writers or DEFAULT_WRITERS),
+                         memory_budget_mb=args.memory_mb or None)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m aurora",
+        description="Aurora Cloud BG Remover - headless background removal")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="remove backgrounds from files or folders")
+    batch.add_argument("inputs", nargs='+', help="input images and/or folders of images")
+    batch.add_argument("output", help="output folder (created if missing)")
+    add_processing_arguments(batch, default_workers())
+    batch.add_argument("--no-resume", action="store_true",
+                       help="reprocess files the output folder's manifest lists as done")
+    batch.set_defaults(func=run_batch_command)
+
+    watch = commands.add_parser("watch", help="process images as they arrive in a folder")
+    watch.add_argument("input", help="folder to watch")
+    watch.add_argument("output", help="output folder (created if missing)")
+    # One worker keeps a single session warm between arrivals
+    add_processing_arguments(watch, 1)
+    watch.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                       help="seconds between folder scans (default: %(default)s)")
+    watch.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                       help="seconds a file must stay unchanged before it is picked up, "
+                            "so partly copied files are skipped (default: %(default)s)")
+    watch.set_defaults(func=run_watch_command)
+
+    serve = commands.add_parser("serve", help="HTTP server: POST an image to /remove")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=server.DEFAULT_PORT)
+    serve.add_argument("--preload", default="u2net",
+                       help="comma-separated models to load before serving (default: %(default)s)")
+    serve.add_argument("--max-concurrent", type=int, default=server.DEFAULT_MAX_CONCURRENT,
+                       help="requests handled at once, more get 503 (default: %(default)s)")
+    serve.add_argument("--max-batch", type=int, default=server.DEFAULT_MAX_BATCH,
+                       help="requests grouped into one model call (default: %(default)s)")
+    serve.add_argument("--batch-wait-ms", type=float, default=server.DEFAULT_BATCH_WAIT * 1000,
+                       help="how long a request waits for others to batch with "
+                            "(default: %(default)s)")
+    serve.add_argument("--quiet", action="store_true", help="don't log every request")
+    serve.add_argument("--no-cache", action="store_true",
+                       help="always run the model, don't read or write the result cache")
+    add_runtime_arguments(serve)
+    add_cache_arguments(serve)
+    serve.set_defaults(func=run_serve_command)
+
+    cache = commands.add_parser("cache", help="show or clear the result cache")
+    cache.add_argument("--clear", action="store_true", help="delete every cached result")
+    add_cache_arguments(cache)
+    cache.set_defaults(func=run_cache_command)
+    return parser
+
+
+def run_batch_command(args):
+    filenames = list_images(args.inputs)
+    if not filenames:
+        print("❌ No images found", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+
+    settings = settings_from_args(args)
+
+    # The manifest in the output folder remembers finished files across runs
+    manifest = BatchManifest(args.output, settings)
+    if not args.no_resume:
+        pending = manifest.pending(filenames)
+        if len(pending) < len(filenames):
+            print(f"⏭️ Resuming: {len(filenames) - len(pending)} of {len(filenames)} images "
+                  f"already done")
+        filenames = pending
+    if not filenames:
+        print("✨ Nothing to do, every image is already processed")
+        return 0
+
+    total = len(filenames)
+    workers = min(workers_from_args(args, default_workers()), total)
+    warn_single_worker_options(args, workers)
+    sessions = SessionCache(runtime=settings.runtime)
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_limit_mb)
+    if workers == 1 and cache is None:
+        print(f"🧠 Loading {args.model} AI Neural Network...")
+        load_start = time.perf_counter()
+        sessions.get(args.model)
+        print(f"   loaded in {time.perf_counter() - load_start:.2f}s")
+    elif workers > 1:
+        print(f"🧠 Starting {workers} workers with {args.model} sessions...")
+
+    proxy = f" • Proxy: {args.proxy_size}px" if args.proxy_size else ""
+    print(f"📦 Batch processing {total} images • Quality: {args.quality} • "
+          f"Format: {args.output_format} ({args.encoder_profile}){proxy}")
+    successful = 0
+    errors = 0
+    encode_seconds = 0.0
+    output_bytes = 0
+    stage_stats = []
+    start = time.perf_counter()
+    try:
+        for result in iter_batch(filenames, args.output, settings, sessions=sessions,
+                                 workers=workers, stage_stats=stage_stats, cache=cache):
+            manifest.record(result)
+            name = Path(result.file_path).name
+            if result.ok:
+                successful += 1
+                encode_seconds += result.encode_seconds
+                output_bytes += result.output_bytes
+                print(f"  ✅ [{result.index + 1}/{total}] {name} -> "
+                      f"{Path(result.save_path).name}  {result.seconds:.2f}s • "
+                      f"{result.output_bytes / 1e6:.2f} MB"
+                      f"{'  (cached)' if result.cached else ''}")
+            else:
+                errors += 1
+                print(f"  ❌ [{result.index + 1}/{total}] {name}: {result.error}  "
+                      f"{result.seconds:.2f}s")
+    except KeyboardInterrupt:
+        manifest.save()
+        if args.metrics:
+            REGISTRY.export(args.metrics)
+        print(f"⏹️ Cancelled after {successful + errors} of {total} images, "
+              f"run the same command again to resume")
+        return 130
+    manifest.save()
+    elapsed = time.perf_counter() - start
+
+    print(f"✨ Batch Complete! Success: {successful}, Errors: {errors}")
+    print(f"⚡ {elapsed:.2f}s total • {elapsed / total:.2f}s/image • "
+          f"{successful / elapsed if elapsed else 0:.2f} images/s")
+    if successful:
+        print(f"📝 Encoding ({args.output_format}, {args.encoder_profile}): "
+              f"{encode_seconds / successful:.3f}s/image • "
+              f"{output_bytes / successful / 1e6:.2f} MB/image • "
+              f"{output_bytes / 1e6:.1f} MB written")
+    if cache is not None:
+        print(cache.stats_text())
+    if stage_stats:
+        print("🔬 Pipeline stages:")
+        for stats in stage_stats:
+            print(f"   {stats.summary(elapsed)}")
+    print("⏱️ Stage timings:")
+    for line in REGISTRY.summary_lines():
+        print(f"   {line}")
+    if args.metrics:
+        REGISTRY.export(args.metrics)
+        print(f"📈 Metrics written to {args.metrics}")
+    if (workers == 1 and settings.batch_size > 1 and args.model in sessions
+            and not supports_batches(sessions.get(args.model))):
+        print(f"⚠️ --batch-size {settings.batch_size} had no effect: the {args.model} model "
+              f"takes one image per run (fixed ONNX batch dimension), so images ran one at a time")
+    return 1 if errors else 0
+
+
+def run_watch_command(args):
+    if not os.path.isdir(args.input):
+        print(f"❌ Not a folder: {args.input}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+
+    settings = settings_from_args(args)
+    workers = workers_from_args(args, 1)
+    warn_single_worker_options(args, workers)
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_limit_mb)
+    stats = WatchStats()
+    control = BatchControl()
+    print(f"👀 Watching {args.input} -> {args.output} • Quality: {args.quality} • "
+          f"Format: {args.output_format} (Ctrl+C to stop)")
+
+    last_summary = time.monotonic()
+    try:
+        for result in watch_folder(args.input, args.output, settings, workers=workers,
+                                   cache=cache, control=control, stats=stats,
+                                   interval=args.interval, settle=args.settle):
+            name = Path(result.file_path).name
+            if result.ok:
+                print(f"  ✅ {name} -> {Path(result.save_path).name}  {result.seconds:.2f}s"
+                      f"{'  (cached)' if result.cached else ''}")
+            else:
+                print(f"  ❌ {name}: {result.error}")
+            if time.monotonic() - last_summary >= 10:
+                print(stats.summary())
+                # Refreshed as it runs, so a scraper can pick the file up
+                if args.metrics:
+                    REGISTRY.export(args.metrics)
+                last_summary = time.monotonic()
+    except KeyboardInterrupt:
+        control.cancel()
+    if args.metrics:
+        REGISTRY.export(args.metrics)
+    print(f"⏹️ Stopped • {stats.summary()}")
+    return 0
+
+
+def run_serve_command(args):
+    sessions = SessionCache(runtime=runtime_from_args(args))
+    for model in filter(None, args.preload.split(',')):
+        print(f"🧠 Loading {model} AI Neural Network...")
+        session = sessions.get(model)
+        if args.max_batch > 1 and not supports_batches(session):
+            print(f"⚠️ {model} takes one image per run (fixed ONNX batch dimension): its "
+                  f"micro-batches run image by image, lower --batch-wait-ms for it")
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_limit_mb)
+    httpd = server.AuroraServer((args.host, args.port), sessions=sessions, cache=cache,
+                                max_concurrent=args.max_concurrent, max_batch=args.max_batch,
+                                batch_wait=args.batch_wait_ms / 1000, quiet=args.quiet)
+    host, port = httpd.server_address[:2]
+    print(f"🌐 Serving on http://{host}:{port}/remove • max {args.max_concurrent} concurrent • "
+          f"batches of up to {args.max_batch} (Ctrl+C to stop)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    stats = httpd.stats_json()
+    print(f"⏹️ Stopped • {stats['requests']} requests • p50 {stats['p50_seconds']:.3f}s / "
+          f"p95 {stats['p95_seconds']:.3f}s • {stats['rejected']} rejected")
+    return 0
+
+
+def run_cache_command(args):
+    cache = ResultCache(args.cache_dir, args.cache_limit_mb)
+    if args.clear:
+        cache.clear()
+        print(f"🗑️ Cleared result cache: {cache.directory}")
+    else:
+        print(f"💾 {cache.directory}: {cache.size_mb():.1f} MB of {args.cache_limit_mb:.0f} MB")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
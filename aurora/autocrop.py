@@ -0,0 +1,109 @@
+"""Auto-crop boxes from a cut-out's alpha, with a threshold, padding and aspect ratio
+
+With a threshold the subject's extent comes from two NumPy reductions of
+the alpha channel, the maximum of each row and then of each column within
+the subject's rows, so the box is read off O(rows + cols) values; a plain
+threshold of 0 is left to Pillow's getbbox, which scans the alpha in C
+without copying it out. The box is measured once per image and serves every
+output format. Padding and the aspect ratio may ask for more room than the
+image has: the box then reaches past its edges and Image.crop fills that
+with transparent pixels (white in JPEGs).
+"""
+
+import numpy as np
+
+
+# Alpha at or below which a pixel counts as background; 0 keeps every visible
+# pixel, a few units more ignores the faint haze alpha matting leaves around
+DEFAULT_THRESHOLD = 0
+
+# Crop shapes offered in the app (label -> width / height, None for the subject's own)
+ASPECTS = {"Tight": None, "1:1": 1.0, "4:5": 0.8, "3:2": 1.5, "16:9": 16 / 9}
+
+
+def parse_aspect(text):
+    """Width / height from "W:H" or a number, None for "" or "tight" """
+    text = str(text).strip().lower()
+    if text in ("", "tight", "none", "0"):
+        return None
+    width, colon, height = text.partition(':')
+    if colon and (not height or float(height) <= 0):
+        raise ValueError(f"aspect ratio needs a positive height, got {text!r}")
+    aspect = float(width) / float(height) if colon else float(width)
+    if aspect <= 0:
+        raise ValueError(f"aspect ratio must be positive, got {text!r}")
+    return aspect
+
+
+def crop_options(threshold=DEFAULT_THRESHOLD, padding=0, aspect=None):
+    """The crop settings that differ from a plain tight crop, for cache keys"""
+    options = {'threshold': threshold, 'padding': padding, 'aspect': aspect}
+    return {name: value for name, value in options.items() if value}
+
+
+def alpha_bbox(alpha, threshold=DEFAULT_THRESHOLD):
+    """(left, top, right, bottom) of the pixels with alpha above threshold, None if none are
+
+    alpha is a mode L image or a 2-D uint8 array.
+    """
+    alpha = np.asarray(alpha)
+    rows = np.flatnonzero(alpha.max(axis=1) > threshold)
+    if not rows.size:
+        return None
+    top, bottom = int(rows[0]), int(rows[-1]) + 1
+    cols = np.flatnonzero(alpha[top:bottom].max(axis=0) > threshold)
+    return int(cols[0]), top, int(cols[-1]) + 1, bottom
+
+
+def subject_bbox(img, threshold=DEFAULT_THRESHOLD):
+    """alpha_bbox of an RGBA image"""
+    if threshold <= 0:
+        # Same pixels, without copying the alpha into an array
+        return img.getbbox()
+    return alpha_bbox(img.getchannel('A'), threshold)
+
+
+def union_box(a, b):
+    """Smallest box holding two boxes, either of which may be None"""
+    if a is None or b is None:
+        return a or b
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _place(start, end, length, limit):
+    """Start of a span of length that holds start..end, kept inside 0..limit if it fits"""
+    centred = start - (length - (end - start)) // 2
+    inside = centred if length > limit else min(max(centred, 0), limit - length)
+    return min(max(inside, end - length), start)
+
+
+def fit_box(bbox, size, padding=0, aspect=None):
+    """Crop box for a subject box: padding px on every side, then grown to aspect
+
+    The padded subject stays where it is; the room the aspect ratio adds is
+    put around it, shifted to stay inside the image where the image is big
+    enough.
+    """
+    width, height = size
+    left, top, right, bottom = (bbox[0] - padding, bbox[1] - padding,
+                                bbox[2] + padding, bbox[3] + padding)
+    if aspect:
+        box_width, box_height = right - left, bottom - top
+        if box_width < box_height * aspect:
+            box_width = round(box_height * aspect)
+        else:
+            box_height = round(box_width / aspect)
+        x = _place(left, right, box_width, width)
+        y = _place(top, bottom, box_height, height)
+        left, top, right, bottom = x, y, x + box_width, y + box_height
+    return left, top, right, bottom
+
+
+def crop_box(img, threshold=DEFAULT_THRESHOLD, padding=0, aspect=None):
+    """Auto-crop box of an RGBA cut-out, None when no pixel is above threshold
+
+    The box only depends on the alpha, so one box serves every output format
+    and variant of the image.
+    """
+    bbox = subject_bbox(img, threshold)
+    return None if bbox is None else fit_box(bbox, img.size, padding, aspect)
@@ -0,0 +1,504 @@
+"""Batch processing loop used by the desktop app and `python -m aurora batch`"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import core
+from .autocrop import DEFAULT_THRESHOLD, crop_options
+from .memory import MemoryThrottle, estimate_mb
+from .metrics import REGISTRY
+from .pipeline import Pipeline
+from .result_cache import ResultCache, cache_key
+from .runtime import RuntimeOptions
+from .sessions import SessionCache
+from .tiled import LARGE_IMAGE_PIXELS, is_large, process_large
+
+
+# Threads finishing and encoding outputs in the single-worker pipeline
+DEFAULT_WRITERS = min(4, os.cpu_count() or 1)
+
+
+class BatchSettings:
+    """Options applied to every image of a batch run"""
+    def __init__(self, model="u2net", quality="Ultra", output_format="png",
+                 auto_crop=False, enhance_edges=False, proxy_size=None, batch_size=1,
+                 runtime=None, large_image_pixels=LARGE_IMAGE_PIXELS,
+                 encoder_profile=core.DEFAULT_ENCODER_PROFILE, writers=DEFAULT_WRITERS,
+                 memory_budget_mb=None, crop_threshold=DEFAULT_THRESHOLD, crop_padding=0,
+                 crop_aspect=None):
+        self.model = model
+        self.quality = quality
+        self.output_format = output_format
+        self.auto_crop = auto_crop
+        self.enhance_edges = enhance_edges
+        # Longest side of the image the model and matting run on, None for full size
+        self.proxy_size = proxy_size
+        # Images per model run in the single-worker pipeline
+        self.batch_size = batch_size
+        # RuntimeOptions for the model sessions, None for ONNX Runtime's defaults
+        self.runtime = runtime
+        # Bigger images are cut out strip by strip (see aurora.tiled), 0 to never do so
+        self.large_image_pixels = large_image_pixels
+        # Encoder settings per output format, a core.ENCODER_PROFILES name
+        self.encoder_profile = encoder_profile
+        self.writers = writers
+        # Resident memory the single-worker pipeline holds new images back at, None for no cap
+        self.memory_budget_mb = memory_budget_mb
+        # Auto-crop: background alpha threshold, margin in px and width / height (None: tight)
+        self.crop_threshold = crop_threshold
+        self.crop_padding = crop_padding
+        self.crop_aspect = crop_aspect
+
+
+class BatchResult:
+    """Outcome of one file in a batch run, error is a message string or None"""
+    def __init__(self, index, file_path, save_path=None, seconds=0.0, error=None,
+                 cached=False, encode_seconds=0.0, output_bytes=0, stages=()):
+        self.index = index
+        self.file_path = file_path
+        self.save_path = save_path
+        self.seconds = seconds
+        self.error = error
+        self.cached = cached
+        # Part of seconds spent encoding the output, and the output's size
+        self.encode_seconds = encode_seconds
+        self.output_bytes = output_bytes
+        # (stage, seconds) timings of a file processed in a worker process, see aurora.metrics
+        self.stages = stages
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BatchControl:
+    """Pause/resume/cancel switch for a running batch, safe to flip from any thread
+
+    Files already being processed finish either way; pausing or cancelling
+    only stops new files from being started.
+    """
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Wake up a paused batch so it can stop
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait(self):
+        """Block while paused, returns False once cancelled"""
+        self._running.wait()
+        return not self._cancelled.is_set()
+
+
+def list_images(paths):
+    """Expand files and folders into a sorted list of image files"""
+    filenames = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            filenames.extend(sorted(str(p) for p in path.iterdir()
+                                    if p.suffix.lower() in core.IMAGE_EXTENSIONS))
+        else:
+            filenames.append(str(path))
+    return filenames
+
+
+def finish_image(img, settings):
+    """Apply the edge and crop options of a batch run"""
+    if settings.enhance_edges:
+        img = core.enhance_edges(img)
+
+    if settings.auto_crop:
+        img = core.auto_crop_image(img, settings.crop_threshold, settings.crop_padding,
+                                   settings.crop_aspect)
+    return img
+
+
+def settings_key(input_data, settings):
+    """Result cache key for an input file processed with batch settings"""
+    return cache_key(input_data, settings.model, settings.quality,
+                     settings.enhance_edges, settings.auto_crop, settings.proxy_size,
+                     crop_options(settings.crop_threshold, settings.crop_padding,
+                                  settings.crop_aspect))
+
+
+def process_file(file_path, output_dir, settings, session, cache=None):
+    """Remove the background of one file and write the result
+
+    Returns the output path, whether the cut-out came from the result cache
+    and the seconds spent encoding. Large images bypass the result cache.
+    """
+    save_path = os.path.join(output_dir, core.output_name(file_path, settings.output_format))
+    if is_large(file_path, settings.large_image_pixels):
+        return save_path, False, process_large(file_path, save_path, session, settings)
+
+    if cache is None:
+        cached = False
+        img = finish_image(core.run_model(core.load_image(file_path), session,
+                                          settings.quality, settings.proxy_size), settings)
+    else:
+        with core.mapped_file(file_path) as input_data:
+            key = settings_key(input_data, settings)
+            img = cache.get(key)
+            cached = img is not None
+            if not cached:
+                img = core.decode_image(input_data, file_path)
+        if not cached:
+            img = finish_image(core.run_model(img, session, settings.quality,
+                                              settings.proxy_size), settings)
+            cache.put(key, img)
+
+    start = time.perf_counter()
+    core.save_image(img, save_path, settings.output_format, settings.encoder_profile)
+    return save_path, cached, time.perf_counter() - start
+
+
+def default_workers():
+    """Worker processes used when none is requested, based on the core count"""
+    # Each rembg session runs multi-threaded itself, so two cores per worker
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def _run_one(i, file_path, output_dir, settings, session, cache):
+    start = time.perf_counter()
+    with REGISTRY.capture() as timings:
+        try:
+            save_path, cached, encode_seconds = process_file(file_path, output_dir, settings,
+                                                             session, cache)
+        except Exception as e:
+            return BatchResult(i, file_path, seconds=time.perf_counter() - start, error=str(e),
+                               stages=timings)
+    return BatchResult(i, file_path, save_path, time.perf_counter() - start, cached=cached,
+                       encode_seconds=encode_seconds, output_bytes=os.path.getsize(save_path),
+                       stages=timings)
+
+
+# Per-process state of a pool worker, filled in by _init_worker
+_worker = {}
+
+
+def _init_worker(output_dir, settings, workers, cache_config):
+    # Split the cores between workers instead of every session grabbing all of them
+    runtime = (settings.runtime or RuntimeOptions()).for_workers(workers)
+    if runtime.intra_threads:
+        os.environ.setdefault('OMP_NUM_THREADS', str(runtime.intra_threads))
+    _worker['output_dir'] = output_dir
+    _worker['settings'] = settings
+    _worker['cache'] = ResultCache(*cache_config) if cache_config else None
+    with REGISTRY.capture() as timings:
+        try:
+            _worker['session'] = core.load_session(settings.model, runtime)
+        except Exception as e:
+            # Raising here would only make the pool start another worker, forever:
+            # every file this worker takes reports the failure instead
+            _worker['error'] = str(e)
+    # Sent back with the worker's first result
+    _worker['stages'] = timings
+
+
+def _worker_task(task):
+    i, file_path = task
+    if 'error' in _worker:
+        return BatchResult(i, file_path, error=_worker['error'])
+    result = _run_one(i, file_path, _worker['output_dir'], _worker['settings'],
+                      _worker['session'], _worker['cache'])
+    result.stages = _worker.pop('stages', []) + result.stages
+    return result
+
+
+def iter_batch(filenames, output_dir, settings, sessions=None, workers=1, stage_stats=None,
+               cache=None, control=None):
+    """Process files, yielding a BatchResult per file in input order
+
+    With one worker the files flow through a decode -> inference -> write
+    pipeline on a single session taken from the sessions cache (a
+    SessionCache), settings.batch_size files per model run, with outputs
+    finished and encoded by settings.writers threads; pass a list as
+    stage_stats to receive the per-stage StageStats. Inputs are memory-mapped
+    rather than read, and with settings.memory_budget_mb no new file starts
+    while the process is over that much resident memory (see
+    aurora.memory.MemoryThrottle). With workers > 1 the files are shared out
+    to a pool of processes that each hold their own rembg session, with the
+    cores split between them unless settings.runtime sets the threads. Files
+    found in the result cache (a ResultCache) skip inference. A failing file
+    is reported through BatchResult.error and does not stop the run. A
+    BatchControl passed as control pauses or cancels the run; after a cancel
+    the files already past inference (with workers, already handed to a
+    worker) are still written and yielded, the rest are not.
+    """
+    workers = max(1, min(workers, len(filenames)))
+    if workers > 1:
+        yield from _iter_batch_parallel(filenames, output_dir, settings, workers, cache, control)
+        return
+
+    if sessions is None:
+        sessions = SessionCache(runtime=settings.runtime)
+
+    yield from _iter_batch_pipeline(filenames, output_dir, settings, sessions, stage_stats, cache,
+                                    control)
+
+
+class _Job:
+    """A file moving through the batch pipeline"""
+    def __init__(self, index, file_path):
+        self.index = index
+        self.file_path = file_path
+        self.data = None
+        self.mask = None
+        self.large = False
+        self.key = None
+        self.cached = False
+        self.save_path = None
+        self.error = None
+        # Dropped by a cancel before it got past inference
+        self.skipped = False
+        # Time spent working on this file, not counting queue waits
+        self.seconds = 0.0
+        self.encode_seconds = 0.0
+        self.output_bytes = 0
+        # Future of the write when it runs on the writer pool
+        self.written = None
+
+    def result(self):
+        return BatchResult(self.index, self.file_path, self.save_path, self.seconds, self.error,
+                           self.cached, self.encode_seconds, self.output_bytes)
+
+
+def _stage(func):
+    """Wrap a stage function so a failing file is carried through as an error"""
+    def run(job):
+        if job.error is None:
+            start = time.perf_counter()
+            try:
+                func(job)
+            except Exception as e:
+                job.error = str(e)
+                job.data = None
+            job.seconds += time.perf_counter() - start
+        return job
+    return run
+
+
+def _each(func):
+    """Apply a per-file stage function to each job of a group"""
+    def run(jobs):
+        for job in jobs:
+            func(job)
+        return jobs
+    return run
+
+
+def _iter_batch_pipeline(filenames, output_dir, settings, sessions, stage_stats, cache,
+                         control):
+    # Loaded on the first cache miss, so a fully cached run never loads the model
+    session = None
+
+    def decode(job):
+        if is_large(job.file_path, settings.large_image_pixels):
+            # Decoded, cut out and written strip by strip in the write stage
+            job.large = True
+            return
+        if cache is None:
+            job.data = core.load_image(job.file_path)
+            return
+        # Mapped, not read: only the decoded image stays once this returns
+        with core.mapped_file(job.file_path) as input_data:
+            job.key = settings_key(input_data, settings)
+            job.data = cache.get(job.key)
+            job.cached = job.data is not None
+            if not job.cached:
+                job.data = core.decode_image(input_data, job.file_path)
+
+    def cancelled(jobs):
+        """Wait out a pause; once cancelled, mark the jobs skipped and return True"""
+        if control is None or control.wait():
+            return False
+        for job in jobs:
+            job.skipped = True
+            job.data = None
+        return True
+
+    def decode_stage(jobs):
+        return jobs if cancelled(jobs) else _each(_stage(decode))(jobs)
+
+    def inference(jobs):
+        nonlocal session
+        if cancelled(jobs):
+            return jobs
+        todo = [job for job in jobs if job.error is None and not job.cached and not job.large]
+        if not todo:
+            return jobs
+        start = time.perf_counter()
+        try:
+            if session is None:
+                session = sessions.get(settings.model)
+            # One model run for the whole group
+            masks = core.predict_masks([job.data for job in todo], session,
+                                       settings.proxy_size, settings.batch_size)
+        except Exception as e:
+            if session is None:
+                for job in todo:
+                    job.error = str(e)
+                    job.data = None
+                return jobs
+            # A bad file spoils the group run, cut_out retries them one by one
+            masks = [None] * len(todo)
+        share = (time.perf_counter() - start) / len(todo)
+        for job, mask in zip(todo, masks):
+            job.seconds += share
+            job.mask = mask
+            cut_out(job)
+        return jobs
+
+    @_stage
+    def cut_out(job):
+        mask = job.mask or core.predict_mask(job.data, session, settings.proxy_size)
+        job.mask = None
+        job.data = core.cut_out(job.data, mask, settings.quality)
+
+    @_stage
+    def write(job):
+        job.save_path = os.path.join(
+            output_dir, core.output_name(job.file_path, settings.output_format))
+        if job.large:
+            job.encode_seconds = process_large(job.file_path, job.save_path,
+                                               sessions.get(settings.model), settings)
+        else:
+            img = job.data
+            job.data = None
+            if not job.cached:
+                img = finish_image(img, settings)
+                if cache is not None:
+                    cache.put(job.key, img)
+            start = time.perf_counter()
+            data = core.encode_image(img, settings.output_format, settings.encoder_profile)
+            # Only the encoded bytes are needed from here on
+            img = None
+            core.write_file(job.save_path, data)
+            job.encode_seconds = time.perf_counter() - start
+        job.output_bytes = os.path.getsize(job.save_path)
+
+    # PIL encoders release the GIL, so several outputs encode at once. The
+    # semaphore caps the files held by the pool; results are collected in order below.
+    writers = ThreadPoolExecutor(settings.writers) if settings.writers > 1 else None
+    slots = threading.BoundedSemaphore(max(1, settings.writers) * 2)
+
+    def submit_writes(jobs):
+        for job in jobs:
+            if job.skipped:
+                continue
+            if writers is None or job.large:
+                # Large images run here, one at a time: each holds its whole
+                # decoded input, several at once would undo their bounded memory
+                write(job)
+                continue
+            slots.acquire()
+            job.written = writers.submit(write, job)
+            job.written.add_done_callback(lambda _: slots.release())
+        return jobs
+
+    # Pipeline items are groups of batch_size jobs
+    pipeline = Pipeline([
+        ("decode", decode_stage),
+        ("inference", inference),
+        ("write", submit_writes),
+    ])
+    if stage_stats is not None:
+        stage_stats.extend(pipeline.stats)
+    throttle = MemoryThrottle(settings.memory_budget_mb) if settings.memory_budget_mb else None
+
+    def groups():
+        group = []
+        for i, file_path in enumerate(filenames):
+            if control is not None and not control.wait():
+                break
+            if throttle is not None:
+                cost = estimate_mb(file_path)
+                if not throttle.try_acquire(cost):
+                    if group:
+                        # The held-back group has to finish before this file can start
+                        yield group
+                        group = []
+                    throttle.acquire(cost)
+            group.append(_Job(i, file_path))
+            if len(group) >= settings.batch_size:
+                yield group
+                group = []
+        if group:
+            yield group
+
+    # Kept in a variable so that when the caller stops early, the throttle is
+    # opened before the pipeline waits for its feeder thread
+    run = pipeline.run(groups())
+    try:
+        for jobs in run:
+            for job in jobs:
+                if job.written is not None:
+                    job.written.result()
+                    job.written = None
+                if throttle is not None:
+                    throttle.release()
+                # Not yielded, so it stays out of the manifest and a resume picks it up
+                if not job.skipped:
+                    yield job.result()
+    finally:
+        if throttle is not None:
+            throttle.close()
+        run.close()
+        if writers is not None:
+            writers.shutdown(wait=True)
+
+
+def _iter_batch_parallel(filenames, output_dir, settings, workers, cache, control):
+    cache_config = (cache.directory, cache.limit_mb) if cache is not None else None
+    # spawn: forking a process that already runs ONNX Runtime threads can deadlock
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(output_dir, settings, workers, cache_config)) as pool:
+        # A small window of queued files keeps every worker busy while still
+        # letting a pause or cancel take effect within a few files. Results
+        # come back in input order.
+        pending = deque()
+
+        def finish():
+            result = pending.popleft().get()
+            # Workers count into their own copies, keep the caller's stats whole
+            if cache is not None and result.ok:
+                cache.record(result.cached)
+            REGISTRY.record_all(result.stages)
+            return result
+
+        for task in enumerate(filenames):
+            while len(pending) >= workers * 2:
+                yield finish()
+            if control is not None and control.paused:
+                # Report what's finished before sitting out the pause
+                while pending:
+                    yield finish()
+            if control is not None and not control.wait():
+                break
+            pending.append(pool.apply_async(_worker_task, (task,)))
+        while pending:
+            yield finish()
@@ -0,0 +1,363 @@
+"""Background removal steps shared by the desktop app and the headless CLI
+
+rembg, ONNX Runtime, pymatting and scipy take seconds to import, so they are
+imported where first used rather than here: the app can show its window
+straight away and warm them up in the background (see import_engine).
+"""
+
+import io
+import mmap
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
+
+from .autocrop import DEFAULT_THRESHOLD, crop_box
+from .inference import predict_batch, supports_batches
+from .metrics import REGISTRY, timer
+from .proxy import guided_upsample, make_proxy, proxy_dims
+from .quantize import is_quantized, load_quantized_session
+
+
+# AI models offered in the UI (name -> description). The -int8 variants are
+# quantized copies made on first use (see aurora.quantize), faster on CPUs.
+MODELS = {
+    "u2net": "Ultra Accurate (Recommended)",
+    "u2netp": "Fast & Efficient",
+    "silueta": "Optimized for People",
+    "u2net-int8": "Ultra Accurate, INT8",
+    "u2netp-int8": "Fast & Efficient, INT8",
+    "silueta-int8": "Optimized for People, INT8",
+}
+
+OUTPUT_FORMATS = ["png", "jpg", "jpeg", "webp", "bmp", "tiff"]
+
+# PIL format name for each output format, so images can be saved to file objects too
+PIL_FORMATS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "webp": "WEBP",
+               "bmp": "BMP", "tiff": "TIFF"}
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tiff', '.gif')
+
+# PIL save options for each encoder profile and PIL format. 'fast' trades
+# file size for encode time, 'smallest' the other way round. JPEG uses 4:2:0
+# chroma subsampling throughout, which the eye hardly sees on photos. Fast
+# WebP is lossless at the lowest effort: exact pixels and the quickest WebP
+# encode there is, at a few times the size of lossy (still half of PNG's).
+ENCODER_PROFILES = {
+    "fast": {
+        "PNG": {'compress_level': 1},
+        "JPEG": {'quality': 90, 'subsampling': 2},
+        "WEBP": {'lossless': True, 'quality': 0, 'method': 0},
+        "TIFF": {},
+        "BMP": {},
+    },
+    "balanced": {
+        "PNG": {'compress_level': 6},
+        "JPEG": {'quality': 92, 'subsampling': 2, 'optimize': True},
+        "WEBP": {'quality': 90, 'method': 4},
+        "TIFF": {},
+        "BMP": {},
+    },
+    "smallest": {
+        "PNG": {'optimize': True},
+        "JPEG": {'quality': 85, 'subsampling': 2, 'optimize': True, 'progressive': True},
+        "WEBP": {'quality': 80, 'method': 6},
+        "TIFF": {'compression': 'tiff_adobe_deflate'},
+        "BMP": {},
+    },
+}
+
+DEFAULT_ENCODER_PROFILE = "balanced"
+
+# Images per model run in predict_masks
+DEFAULT_BATCH_SIZE = 8
+
+# Alpha matting settings for each quality level. 'banded' matting solves only
+# the band around the mask edge in tiles (see aurora.matting), much faster
+# and lighter on memory than rembg's whole-image solver.
+QUALITY_PRESETS = {
+    "Standard": {'alpha_matting': False},
+    "High": {
+        'alpha_matting': True,
+        'alpha_matting_foreground_threshold': 230,
+        'alpha_matting_background_threshold': 15,
+        'alpha_matting_erode_size': 8
+    },
+    "Ultra": {
+        'alpha_matting': True,
+        'alpha_matting_foreground_threshold': 240,
+        'alpha_matting_background_threshold': 10,
+        'alpha_matting_erode_size': 10
+    },
+    "Fast Ultra": {
+        'alpha_matting': True,
+        'alpha_matting_foreground_threshold': 240,
+        'alpha_matting_background_threshold': 10,
+        'alpha_matting_erode_size': 10,
+        'alpha_matting_engine': 'banded'
+    },
+}
+
+
+def model_label(model_name):
+    """Combobox label for a model name"""
+    return f"{model_name} - {MODELS[model_name]}"
+
+
+def model_from_label(label):
+    """Model name from a combobox label"""
+    return label.split(' - ')[0]
+
+
+def alpha_settings(quality):
+    """rembg keyword arguments for a quality level"""
+    return dict(QUALITY_PRESETS.get(quality, QUALITY_PRESETS["Standard"]))
+
+
+def import_engine():
+    """Import the model and matting libraries now instead of on the first image"""
+    # rembg brings in ONNX Runtime and pymatting
+    import rembg
+    import scipy.ndimage
+
+
+def load_session(model_name, runtime=None):
+    """Load the ONNX model behind a rembg session, with RuntimeOptions if given"""
+    from rembg import new_session
+
+    sess_opts = None if runtime is None else runtime.session_options()
+    with timer("session_load"):
+        if is_quantized(model_name):
+            return load_quantized_session(model_name, sess_opts)
+        return new_session(model_name, sess_opts=sess_opts)
+
+
+def read_file(file_path):
+    """Bytes of an input file"""
+    with timer("read"), open(file_path, 'rb') as f:
+        return f.read()
+
+
+@contextmanager
+def mapped_file(file_path):
+    """An input file as a read-only memory map, unmapped when the block ends
+
+    The map is bytes-like, so it can be hashed and passed to decode_image
+    without the file ever being copied into Python memory: the OS pages it
+    in as it is read and can drop those pages again at any time. 'read' only
+    times mapping it, the disk reads fall to whoever touches the data.
+    """
+    with timer("read"), open(file_path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            data = b''
+    try:
+        yield data
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def load_image(file_path):
+    """Open and fully decode an input image, rotated upright
+
+    The pixels are read from the file while decoding, so 'read' only times
+    opening it and the header here.
+    """
+    with timer("read"):
+        img = Image.open(file_path)
+    with timer("decode"):
+        img.load()
+        # Apply the camera rotation up front so the mask and the cut-out line up
+        ImageOps.exif_transpose(img, in_place=True)
+    return img
+
+
+def decode_image(input_data, name=None):
+    """Fully decode an input image from encoded bytes or a mapped_file, rotated upright
+
+    name, the file the data came from, goes into the error for data that
+    isn't an image.
+    """
+    with timer("decode"):
+        try:
+            if isinstance(input_data, mmap.mmap):
+                # Read in place, wrapping it in BytesIO would copy the whole file
+                input_data.seek(0)
+                img = Image.open(input_data)
+            else:
+                img = Image.open(io.BytesIO(input_data))
+        except (UnidentifiedImageError, ValueError) as e:
+            # Pillow's format checks can seek past the end of garbage, which a
+            # map reports as ValueError("seek out of range")
+            raise UnidentifiedImageError(
+                f"cannot identify image file {name!r}" if name else "cannot identify image file"
+            ) from e
+        img.load()
+        ImageOps.exif_transpose(img, in_place=True)
+    return img
+
+
+def predict_mask(img, session, proxy_size=None):
+    """Run the AI model, returns its soft foreground mask (mode L)
+
+    The mask is at the image size, or with proxy_size at the size of a
+    downscaled copy whose longest side is proxy_size. Passing a PIL image (not
+    bytes) makes rembg hand back a PIL image too, which skips a PNG encode and
+    decode of the full-size result.
+    """
+    from rembg import remove
+
+    with timer("inference"):
+        return remove(_model_input(img, proxy_size), session=session, only_mask=True)
+
+
+def predict_masks(images, session, proxy_size=None, batch_size=DEFAULT_BATCH_SIZE):
+    """AI masks for several images on one session, in order
+
+    U²-Net models with a dynamic batch dimension get up to batch_size images
+    stacked into each ONNX Runtime call; other models run one image at a time.
+    """
+    if batch_size <= 1 or len(images) == 1 or not supports_batches(session):
+        return [predict_mask(img, session, proxy_size) for img in images]
+
+    images = [_model_input(img, proxy_size) for img in images]
+    masks = []
+    for start in range(0, len(images), batch_size):
+        group = images[start:start + batch_size]
+        run_start = time.perf_counter()
+        masks.extend(predict_batch(group, session))
+        # One timing per image, like unbatched runs
+        share = (time.perf_counter() - run_start) / len(group)
+        for _ in group:
+            REGISTRY.record("inference", share)
+    return masks
+
+
+def _model_input(img, proxy_size):
+    if proxy_size and max(img.size) > proxy_size:
+        return make_proxy(img, proxy_dims(img.size, proxy_size))
+    return img
+
+
+def cut_out(img, mask, quality="Ultra"):
+    """Apply a mask to the image, refining the edges with alpha matting for High/Ultra
+
+    A mask smaller than the image comes from proxy mode: matting runs on a
+    proxy of the same size and only the final alpha is brought back to full
+    resolution, edge-aware, for compositing.
+    """
+    with timer("matting"):
+        if mask.size != img.size:
+            proxy = make_proxy(img, mask.size)
+            alpha = guided_upsample(_cut_out(proxy, mask, quality).getchannel('A'), proxy, img)
+            cutout = img.convert('RGBA')
+            cutout.putalpha(alpha)
+            return cutout
+        return _cut_out(img, mask, quality)
+
+
+def _cut_out(img, mask, quality):
+    from rembg.bg import alpha_matting_cutout, naive_cutout
+
+    from .matting import banded_matting_cutout
+
+    settings = alpha_settings(quality)
+    if settings['alpha_matting']:
+        matting = (banded_matting_cutout if settings.get('alpha_matting_engine') == 'banded'
+                   else alpha_matting_cutout)
+        try:
+            return matting(img, mask,
+                           settings['alpha_matting_foreground_threshold'],
+                           settings['alpha_matting_background_threshold'],
+                           settings['alpha_matting_erode_size'])
+        except ValueError:
+            # The matting solver can fail on masks without an unknown band
+            pass
+    return naive_cutout(img, mask)
+
+
+def run_model(img, session, quality="Ultra", proxy_size=None):
+    """Run the AI model on a PIL image, returns the RGBA cut-out"""
+    return cut_out(img, predict_mask(img, session, proxy_size), quality)
+
+
+def enhance_edges(img):
+    """Sharpen the cut-out edges"""
+    with timer("unsharp"):
+        return img.filter(ImageFilter.UnsharpMask(radius=2, percent=150, threshold=3))
+
+
+def auto_crop_image(img, threshold=DEFAULT_THRESHOLD, padding=0, aspect=None, box=None):
+    """Auto-crop to content
+
+    Pixels with alpha at or below threshold count as background, padding
+    adds a margin in px and aspect (width / height, e.g. 1.0 for square
+    product shots) grows the box to that shape; see aurora.autocrop. Pass a
+    box from autocrop.crop_box to cut several variants of one image alike
+    without measuring it again.
+    """
+    if img.mode != 'RGBA':
+        return img
+
+    with timer("crop"):
+        if box is None:
+            box = crop_box(img, threshold, padding, aspect)
+        if box:
+            return img.crop(box)
+    return img
+
+
+def output_name(file_path, output_format):
+    """File name used for a processed image"""
+    return f"{Path(file_path).stem}_aurora_no_bg.{output_format}"
+
+
+def encoder_options(output_format, profile=DEFAULT_ENCODER_PROFILE):
+    """PIL save keyword arguments for an output format under an encoder profile"""
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"unknown encoder profile {profile!r}, "
+                         f"one of {', '.join(ENCODER_PROFILES)}")
+    return dict(ENCODER_PROFILES[profile][PIL_FORMATS[output_format.lower()]])
+
+
+def save_image(img, save_path, output_format, profile=DEFAULT_ENCODER_PROFILE):
+    """Save a processed image to a path or file object, flattening transparency for JPEG
+
+    A path is encoded in memory first, so encoding and writing the file are
+    timed apart.
+    """
+    if isinstance(save_path, (str, os.PathLike)):
+        write_file(save_path, encode_image(img, output_format, profile))
+        return
+    with timer("encode"):
+        _save(img, save_path, output_format, profile)
+
+
+def write_file(save_path, data):
+    """Write encoded output bytes to a file"""
+    with timer("write"), open(save_path, 'wb') as f:
+        f.write(data)
+
+
+def _save(img, fp, output_format, profile):
+    pil_format = PIL_FORMATS[output_format.lower()]
+    options = encoder_options(output_format, profile)
+    if pil_format == 'JPEG':
+        # Handle JPEG transparency
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[3] if 'A' in img.getbands() else None)
+        rgb_img.save(fp, pil_format, **options)
+    else:
+        img.save(fp, pil_format, **options)
+
+
+def encode_image(img, output_format, profile=DEFAULT_ENCODER_PROFILE):
+    """A processed image encoded in an output format, as bytes"""
+    buf = io.BytesIO()
+    save_image(img, buf, output_format, profile)
+    return buf.getvalue()
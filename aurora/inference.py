@@ -0,0 +1,50 @@
+"""Batched U²-Net inference: several images through one ONNX Runtime call"""
+
+import numpy as np
+from PIL import Image
+
+
+# Sessions whose predict() is U²-Net's: 320x320 input, ImageNet mean/std, one mask out
+BATCHABLE_SESSIONS = ("U2netSession", "U2netpSession", "SiluetaSession", "U2netCustomSession")
+
+INPUT_SIZE = (320, 320)
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def supports_batches(session):
+    """Whether a session's model takes more than one image per run"""
+    # By class name, so this module doesn't have to import rembg
+    if type(session).__name__ not in BATCHABLE_SESSIONS:
+        return False
+    batch_dim = session.inner_session.get_inputs()[0].shape[0]
+    # A symbolic name (e.g. 'batch') or None means any size, an int is fixed
+    return not isinstance(batch_dim, int) or batch_dim != 1
+
+
+def preprocess(images):
+    """Stack images into one normalised N x 3 x 320 x 320 float32 tensor, like rembg's normalize"""
+    pixels = np.stack([np.asarray(img.convert('RGB').resize(INPUT_SIZE, Image.Resampling.LANCZOS))
+                       for img in images])
+    # rembg scales each image by its own maximum before normalising
+    peak = np.maximum(pixels.max(axis=(1, 2, 3)).astype(np.float32), 1e-6)
+    batch = np.ascontiguousarray(pixels.transpose(0, 3, 1, 2), dtype=np.float32)
+    # (x / peak - mean) / std as one multiply and one subtract, in place
+    batch *= (1 / (peak[:, None] * STD))[:, :, None, None]
+    batch -= (MEAN / STD)[:, None, None]
+    return batch
+
+
+def postprocess(pred, size):
+    """Mask (mode L) at an image size from one 320x320 model output"""
+    low, high = pred.min(), pred.max()
+    pred = (pred - low) / (high - low)
+    mask = Image.fromarray((pred.clip(0, 1) * 255).astype(np.uint8), 'L')
+    return mask.resize(size, Image.Resampling.LANCZOS)
+
+
+def predict_batch(images, session):
+    """Masks for a list of images from a single session run"""
+    inner = session.inner_session
+    outputs = inner.run(None, {inner.get_inputs()[0].name: preprocess(images)})
+    return [postprocess(pred, img.size) for pred, img in zip(outputs[0][:, 0], images)]
@@ -0,0 +1,132 @@
+"""Job manifest kept in a batch output folder, so an interrupted batch resumes where it stopped"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+MANIFEST_NAME = "aurora_manifest.json"
+
+# Rewrite the manifest at most this often while a batch runs (seconds)
+SAVE_INTERVAL = 2.0
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# BatchSettings that change how fast, not what comes out
+NEUTRAL_SETTINGS = ('batch_size', 'runtime', 'writers', 'memory_budget_mb')
+
+
+def settings_record(settings):
+    """JSON-friendly copy of the BatchSettings that decide the output"""
+    return {name: value for name, value in sorted(vars(settings).items())
+            if name not in NEUTRAL_SETTINGS}
+
+
+class BatchManifest:
+    """Per-file status of a batch, stored as JSON in the output folder
+
+    For every input file it records "done" (with the output name and its
+    SHA-256) or "error", plus the input's size, mtime and SHA-256. A file
+    counts as done on a later run only if it was processed with the same
+    settings, the input is unchanged and its output is still there. Writes are batched and
+    atomic, so killing the app loses at most the last couple of seconds.
+    """
+    def __init__(self, output_dir, settings):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.settings = settings_record(settings)
+        self.files = {}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('settings') == self.settings:
+            self.files = data.get('files', {})
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.abspath(file_path)
+
+    def is_done(self, file_path, check_hash=False):
+        """Whether a file was processed already and is unchanged since
+
+        Unchanged means same size and mtime. With check_hash, a file whose
+        mtime moved but whose content hashes the same (copied again, touched)
+        counts as done too.
+        """
+        key = self._key(file_path)
+        entry = self.files.get(key)
+        if not entry or entry.get('status') != 'done':
+            return False
+        try:
+            stat = os.stat(file_path)
+            output = os.path.join(os.path.dirname(self.path), entry['output'])
+            output_size = os.path.getsize(output)
+        except OSError:
+            return False
+        if stat.st_size != entry.get('input_size') or output_size != entry.get('output_size'):
+            return False
+        if stat.st_mtime == entry.get('input_mtime'):
+            return True
+        if not check_hash or file_sha256(file_path) != entry.get('input_sha256'):
+            return False
+        with self._lock:
+            entry['input_mtime'] = stat.st_mtime
+            self._dirty = True
+        return True
+
+    def pending(self, filenames):
+        """Files that still need processing"""
+        return [file_path for file_path in filenames if not self.is_done(file_path)]
+
+    def record(self, result):
+        """Store the outcome of a BatchResult"""
+        entry = {'status': 'done' if result.ok else 'error', 'seconds': round(result.seconds, 3)}
+        error = result.error
+        try:
+            stat = os.stat(result.file_path)
+            entry['input_size'] = stat.st_size
+            entry['input_mtime'] = stat.st_mtime
+            entry['input_sha256'] = file_sha256(result.file_path)
+            if result.ok:
+                entry['output'] = os.path.basename(result.save_path)
+                entry['output_size'] = os.path.getsize(result.save_path)
+                entry['sha256'] = file_sha256(result.save_path)
+        except OSError as e:
+            entry['status'] = 'error'
+            error = error or str(e)
+        if error:
+            entry['error'] = error
+
+        with self._lock:
+            self.files[self._key(result.file_path)] = entry
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def save(self):
+        """Write the manifest if anything changed since the last write"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({'settings': self.settings, 'files': self.files}, indent=1)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,105 @@
+"""Memory-aware batches: current RSS, heap trimming and a throttle on images in flight"""
+
+import ctypes
+import os
+import threading
+
+from .tiled import image_pixels
+
+
+# Assumed working set per pixel of an image in flight: the decoded RGB, the
+# RGBA cut-out, the mask and the float copies alpha matting makes
+BYTES_PER_PIXEL = 16
+
+
+def rss_mb():
+    """Current resident memory of this process in MB, None where it can't be read
+
+    Reads /proc on Linux; elsewhere psutil is used if it is installed.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+_libc = None
+
+
+def trim_heap():
+    """Give freed heap pages back to the OS (glibc only), so RSS shows what is in use"""
+    global _libc
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL('libc.so.6')
+        _libc.malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def estimate_mb(file_path):
+    """Rough memory an image file takes while it is processed, from its header"""
+    try:
+        return image_pixels(file_path) * BYTES_PER_PIXEL / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+class MemoryThrottle:
+    """Hold back new images while the process is over an RSS budget
+
+    acquire() blocks while other images are in flight and the current RSS
+    plus the new image's estimate would go over budget_mb; with nothing in
+    flight an image is always let through, so a batch never stalls. Call
+    release() once an image's output is written, and close() to let every
+    waiting acquire() return when the run stops. Without a way to read RSS
+    (see rss_mb) nothing is throttled.
+    """
+    def __init__(self, budget_mb):
+        self.budget_mb = budget_mb
+        self.in_flight = 0
+        # Images that had to wait for memory to free up
+        self.waits = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def fits(self, cost_mb=0.0):
+        """Whether an image of cost_mb would start now without waiting"""
+        rss = rss_mb()
+        if rss is None or rss + cost_mb <= self.budget_mb:
+            return True
+        # Freed images may still sit in the allocator's free lists
+        trim_heap()
+        return rss_mb() + cost_mb <= self.budget_mb
+
+    def try_acquire(self, cost_mb=0.0):
+        """acquire() without waiting, False if the image would have to wait"""
+        with self._cond:
+            if self.in_flight and not self._closed and not self.fits(cost_mb):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self, cost_mb=0.0):
+        with self._cond:
+            if self.in_flight and not self._closed and not self.fits(cost_mb):
+                self.waits += 1
+                while self.in_flight and not self._closed and not self.fits(cost_mb):
+                    self._cond.wait(0.1)
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
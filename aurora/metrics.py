@@ -0,0 +1,220 @@
+"""Per-stage timings of the processing steps, exported as JSON, CSV or Prometheus text
+
+The steps in aurora.core and aurora.preview time themselves with
+perf_counter into REGISTRY, so the app, the CLI and the server all feed it.
+Each stage keeps lifetime totals with fixed histogram buckets (what
+Prometheus scrapes) and a rolling window of its latest timings, which the
+percentiles come from so a regression shows up within a few hundred images.
+"""
+
+import csv
+import io
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# Stages in processing order, others are reported after these
+STAGES = ("session_load", "read", "decode", "inference", "matting", "unsharp", "crop",
+          "preview", "encode", "write")
+
+# Upper bounds of the histogram buckets in seconds, +Inf comes on top
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0)
+
+# Latest timings per stage the percentiles are taken from
+DEFAULT_WINDOW = 1000
+
+PERCENTILES = (50, 95, 99)
+
+CSV_FIELDS = ("stage", "count", "total_seconds", "mean_seconds", "p50_seconds",
+              "p95_seconds", "p99_seconds", "max_seconds")
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of some values, 0.0 when there are none"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # The smallest value with at least percent% of the values at or below it
+    rank = math.ceil(len(ordered) * percent / 100)
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+
+def _stage_order(name):
+    return (STAGES.index(name) if name in STAGES else len(STAGES), name)
+
+
+class StageHistogram:
+    """Timings of one stage: lifetime count, sum and buckets plus a rolling window"""
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        # Per-bucket counts, the last one for timings above every bound
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def snapshot(self):
+        ordered = sorted(self.recent)
+        data = {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_seconds': round(self.total / self.count, 6) if self.count else 0.0,
+        }
+        for percent in PERCENTILES:
+            data[f'p{percent}_seconds'] = round(percentile(ordered, percent), 6)
+        data['max_seconds'] = round(ordered[-1], 6) if ordered else 0.0
+        # Cumulative, like Prometheus buckets
+        data['buckets'] = {}
+        seen = 0
+        for bound, n in zip(BUCKETS + ('+Inf',), self.buckets):
+            seen += n
+            data['buckets'][str(bound)] = seen
+        return data
+
+
+class MetricsRegistry:
+    """Thread-safe StageHistograms by stage name"""
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.started = time.time()
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = StageHistogram(self.window)
+            self._stages[stage].record(seconds)
+        captured = getattr(self._local, 'captured', None)
+        if captured is not None:
+            captured.append((stage, seconds))
+
+    def record_all(self, timings):
+        """Record (stage, seconds) pairs, e.g. captured in a worker process"""
+        for stage, seconds in timings:
+            self.record(stage, seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the block under a stage name; a block that raises isn't recorded"""
+        start = time.perf_counter()
+        yield
+        self.record(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def capture(self):
+        """Collect the (stage, seconds) pairs recorded on this thread inside the block"""
+        outer = getattr(self._local, 'captured', None)
+        captured = []
+        self._local.captured = captured
+        try:
+            yield captured
+        finally:
+            self._local.captured = outer
+            if outer is not None:
+                outer.extend(captured)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """All stages as plain data, in processing order"""
+        with self._lock:
+            names = sorted(self._stages, key=_stage_order)
+            stages = {name: self._stages[name].snapshot() for name in names}
+        return {'uptime_seconds': round(time.time() - self.started, 3), 'stages': stages}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_csv(self):
+        """One row per stage, without the buckets"""
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, CSV_FIELDS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for name, data in self.snapshot()['stages'].items():
+            writer.writerow(dict(data, stage=name))
+        return buf.getvalue()
+
+    def to_prometheus(self, prefix="aurora"):
+        """Prometheus text exposition: a histogram per stage plus the rolling percentiles"""
+        stages = self.snapshot()['stages']
+        lines = [f"# HELP {prefix}_stage_seconds Time spent in each processing stage",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for name, data in stages.items():
+            for bound, count in data['buckets'].items():
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {data["total_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {data["count"]}')
+        lines += [f"# HELP {prefix}_stage_recent_seconds Percentiles of the latest "
+                  f"{self.window} timings of each stage",
+                  f"# TYPE {prefix}_stage_recent_seconds gauge"]
+        for name, data in stages.items():
+            for percent in PERCENTILES:
+                lines.append(f'{prefix}_stage_recent_seconds{{stage="{name}",'
+                             f'quantile="{percent / 100}"}} {data[f"p{percent}_seconds"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the metrics to a file: CSV for .csv, Prometheus text for .prom/.txt, else JSON"""
+        suffix = Path(path).suffix.lower()
+        if suffix == '.csv':
+            text = self.to_csv()
+        elif suffix in ('.prom', '.txt'):
+            text = self.to_prometheus()
+        else:
+            text = self.to_json()
+        # Replaced in one go, so whoever reads the file never sees half of it
+        partial = f"{path}.partial"
+        with open(partial, 'w', newline='') as f:
+            f.write(text)
+        os.replace(partial, path)
+
+    def summary_lines(self):
+        """One report line per stage: calls, mean and p95"""
+        return [f"{name}: {data['count']} calls • avg {data['mean_seconds'] * 1000:.1f} ms • "
+                f"p95 {data['p95_seconds'] * 1000:.1f} ms • {data['total_seconds']:.2f}s total"
+                for name, data in self.snapshot()['stages'].items()]
+
+
+# Shared by everything in the process
+REGISTRY = MetricsRegistry()
+
+
+def timer(stage):
+    """REGISTRY.timer"""
+    return REGISTRY.timer(stage)
+
+
+def capture():
+    """REGISTRY.capture"""
+    return REGISTRY.capture()
+
+
+def stage_totals(timings):
+    """Seconds per stage of captured (stage, seconds) pairs, in processing order"""
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return {stage: totals[stage] for stage in sorted(totals, key=_stage_order)}
+
+
+def format_timings(timings):
+    """'inference 1.20s • matting 0.35s' for captured (stage, seconds) pairs"""
+    return " • ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stage_totals(timings).items())
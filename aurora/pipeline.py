@@ -0,0 +1,110 @@
+"""Threaded pipeline: each stage runs on its own thread, linked by bounded queues"""
+
+import queue
+import threading
+import time
+
+
+# Marks the end of the item stream
+_DONE = object()
+
+
+class StageStats:
+    """Busy time and input queue depth of one pipeline stage"""
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self._depth_total = 0
+
+    def record(self, depth, seconds):
+        self.items += 1
+        self.busy += seconds
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+
+    @property
+    def mean_depth(self):
+        return self._depth_total / self.items if self.items else 0.0
+
+    def summary(self, elapsed):
+        """One-line report, busy share of the elapsed wall time"""
+        share = self.busy / elapsed * 100 if elapsed else 0.0
+        return (f"{self.name}: busy {self.busy:.2f}s ({share:.0f}%) • "
+                f"queue avg {self.mean_depth:.1f} / max {self.max_depth}")
+
+
+class Pipeline:
+    """Run items through a chain of stage functions, one thread per stage
+
+    Each stage function takes an item and returns the item for the next stage.
+    Queues between stages are bounded, so a slow stage holds back the ones
+    before it instead of letting work pile up in memory. Items come out in the
+    order they went in.
+    """
+    def __init__(self, stages, queue_size=2):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(name) for name, _ in stages]
+        self._stop = threading.Event()
+
+    def _put(self, q, item):
+        # Retry so threads notice a stop request instead of blocking forever
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _feed(self, items, out_q):
+        for item in items:
+            if not self._put(out_q, item):
+                return
+        self._put(out_q, _DONE)
+
+    def _work(self, func, stats, in_q, out_q):
+        while True:
+            item = self._get(in_q)
+            if item is _DONE:
+                self._put(out_q, _DONE)
+                return
+            depth = in_q.qsize()
+            start = time.perf_counter()
+            item = func(item)
+            stats.record(depth, time.perf_counter() - start)
+            if not self._put(out_q, item):
+                return
+
+    def run(self, items):
+        """Generator yielding the processed items in input order"""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), daemon=True)]
+        for n, (_, func) in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=self._work, args=(func, self.stats[n], queues[n], queues[n + 1]),
+                daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(queues[-1])
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            # Also reached when the consumer stops early
+            self._stop.set()
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,80 @@
+"""INT8 model variants: dynamically quantized copies of the U²-Net models for CPU inference
+
+The quantized file is made from the FP32 model on first use and kept next
+to it in the rembg model folder, then loaded through rembg's u2net_custom
+session, which shares U²-Net's pre- and post-processing.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+
+INT8_SUFFIX = "-int8"
+
+# One quantization at a time, so two sessions loading together don't both write the file
+_lock = threading.Lock()
+
+
+def is_quantized(model_name):
+    return model_name.endswith(INT8_SUFFIX)
+
+
+def base_model(model_name):
+    """FP32 model an INT8 variant is made from, the model itself otherwise"""
+    return model_name[:-len(INT8_SUFFIX)] if is_quantized(model_name) else model_name
+
+
+def _session_class(model_name):
+    from rembg.sessions import sessions_class
+
+    for cls in sessions_class:
+        if cls.name() == model_name:
+            return cls
+    raise ValueError(f"No session class found for model '{model_name}'")
+
+
+def fp32_path(model_name):
+    """Path of a model's ONNX file, downloading it if needed"""
+    return str(_session_class(base_model(model_name)).download_models())
+
+
+def quantized_path(model_name):
+    """Where the INT8 variant of a model is (or will be) stored"""
+    source = Path(fp32_path(model_name))
+    return str(source.with_name(f"{source.stem}{INT8_SUFFIX}.onnx"))
+
+
+def model_file(model_name):
+    """ONNX file behind a model name, INT8 variants included"""
+    return quantized_path(model_name) if is_quantized(model_name) else fp32_path(model_name)
+
+
+def quantize_model(model_name, force=False):
+    """Write the INT8 variant of a model if it isn't there yet, returns its path
+
+    Weights are stored as unsigned 8-bit integers and activations are
+    quantized on the fly, so no calibration images are needed.
+    """
+    target = quantized_path(model_name)
+    with _lock:
+        if os.path.exists(target) and not force:
+            return target
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError as e:
+            raise RuntimeError("INT8 models need the 'onnx' package: pip install onnx") from e
+
+        # Write to a temporary name first, so an interrupted run leaves no broken model
+        partial = target + ".partial"
+        quantize_dynamic(fp32_path(model_name), partial, weight_type=QuantType.QUInt8)
+        os.replace(partial, target)
+    return target
+
+
+def load_quantized_session(model_name, sess_opts=None):
+    """rembg session running the INT8 variant of a model, quantizing it on first use"""
+    from rembg import new_session
+
+    path = quantize_model(model_name)
+    return new_session("u2net_custom", sess_opts=sess_opts, model_path=path)
@@ -0,0 +1,144 @@
+"""On-disk cache of finished cut-outs, keyed by the input bytes and processing settings"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from PIL import Image
+
+from . import core
+
+
+DEFAULT_LIMIT_MB = 2048
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'aurora', 'results')
+
+
+def cache_key(input_data, model, quality, enhance_edges, auto_crop, proxy_size=None, crop=None):
+    """Hash of everything that decides the cut-out: input bytes, model and options
+
+    crop holds the auto-crop settings from autocrop.crop_options; a plain
+    tight crop leaves it empty, so its keys stay as they were.
+    """
+    settings = {
+        'model': model,
+        'alpha': core.alpha_settings(quality),
+        'enhance_edges': bool(enhance_edges),
+        'auto_crop': bool(auto_crop),
+        'proxy_size': proxy_size or None,
+    }
+    if auto_crop and crop:
+        settings['crop'] = crop
+    h = hashlib.sha256(input_data)
+    h.update(json.dumps(settings, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Finished RGBA cut-outs stored as PNG files, evicted least recently used first
+
+    Reading an entry bumps its mtime, so mtime order is LRU order. Several
+    processes may share one directory; each keeps its own running size
+    estimate and rescans the directory before evicting.
+    """
+    def __init__(self, directory=None, limit_mb=DEFAULT_LIMIT_MB):
+        self.directory = directory or default_cache_dir()
+        self.limit_mb = limit_mb
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.png')
+
+    def get(self, key):
+        """Cached cut-out for a key, or None"""
+        path = self._path(key)
+        try:
+            img = Image.open(path)
+            img.load()
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return img
+
+    def put(self, key, img):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # Fast compression: entries are written far more often than they are re-read
+        img.save(tmp_path, 'PNG', compress_level=1)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.limit_mb * 1024 * 1024:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        for path in Path(self.directory).glob('*/*.png'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Trim to 90% so the next few puts don't each trigger a rescan
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.limit_mb * 1024 * 1024 * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self):
+        """Delete every cached entry"""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._size = 0
+
+    def size_mb(self):
+        with self._lock:
+            return self._scan_size() / (1024 * 1024)
+
+    def record(self, hit):
+        """Count a lookup that happened elsewhere, e.g. in a worker process"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats_text(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0
+        return f"💾 Result Cache: {self.hits} hits / {self.misses} misses ({rate:.0f}%)"
@@ -0,0 +1,71 @@
+"""ONNX Runtime session options: threads, graph optimization and memory arena"""
+
+import os
+
+
+# Graph optimization levels by name -> ort.GraphOptimizationLevel member
+GRAPH_OPTIMIZATIONS = {
+    "disabled": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+class RuntimeOptions:
+    """How ONNX Runtime runs a model session
+
+    0 threads leaves the choice to ONNX Runtime, which takes every core;
+    several sessions running side by side then fight over them. Set
+    intra_threads to split the cores instead (see for_workers). The memory
+    arena keeps freed tensors around for reuse: faster, but the process
+    holds on to its peak memory.
+    """
+    def __init__(self, intra_threads=0, inter_threads=0, graph_optimization="all",
+                 parallel=False, cpu_arena=True, mem_pattern=True):
+        self.intra_threads = intra_threads
+        self.inter_threads = inter_threads
+        if graph_optimization not in GRAPH_OPTIMIZATIONS:
+            raise ValueError(f"unknown graph optimization {graph_optimization!r}, "
+                             f"one of {', '.join(GRAPH_OPTIMIZATIONS)}")
+        self.graph_optimization = graph_optimization
+        # Run independent graph branches at the same time (uses inter_threads)
+        self.parallel = parallel
+        self.cpu_arena = cpu_arena
+        self.mem_pattern = mem_pattern
+
+    def session_options(self):
+        """ort.SessionOptions for new_session(sess_opts=...)"""
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = self.intra_threads
+        opts.inter_op_num_threads = self.inter_threads
+        opts.graph_optimization_level = getattr(ort.GraphOptimizationLevel,
+                                                GRAPH_OPTIMIZATIONS[self.graph_optimization])
+        opts.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if self.parallel
+                               else ort.ExecutionMode.ORT_SEQUENTIAL)
+        opts.enable_cpu_mem_arena = self.cpu_arena
+        opts.enable_mem_pattern = self.mem_pattern
+        return opts
+
+    def for_workers(self, workers):
+        """Copy with the cores split between workers, unless threads were set explicitly"""
+        if self.intra_threads or workers <= 1:
+            return self
+        opts = RuntimeOptions(**vars(self))
+        opts.intra_threads = max(1, (os.cpu_count() or 1) // workers)
+        opts.inter_threads = self.inter_threads or 1
+        return opts
+
+    def __eq__(self, other):
+        return isinstance(other, RuntimeOptions) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return "RuntimeOptions({})".format(
+            ", ".join(f"{name}={value!r}" for name, value in vars(self).items()))
+
+    def describe(self):
+        threads = self.intra_threads or "auto"
+        extra = "" if self.cpu_arena else " • no arena"
+        return f"⚙️ Threads: {threads} • Graph: {self.graph_optimization}{extra}"
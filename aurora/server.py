@@ -0,0 +1,305 @@
+"""Local HTTP server: POST an image to /remove, get the cut-out back
+
+    python -m aurora serve --port 8008
+    curl --data-binary @photo.jpg "http://127.0.0.1:8008/remove?model=u2netp&format=webp" -o out.webp
+
+Sessions stay loaded between requests, and requests arriving together are
+grouped into micro-batches for the model. GET /stats reports latency
+percentiles and per-stage timings, GET /metrics the same in Prometheus text
+format, GET /health answers once the server is up.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from . import core
+from .autocrop import DEFAULT_THRESHOLD, parse_aspect
+from .batch import BatchSettings, finish_image, settings_key
+from .metrics import REGISTRY, percentile, timer
+from .sessions import SessionCache
+
+
+DEFAULT_PORT = 8008
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_MAX_BATCH = 4
+# How long the first request of a batch waits for others to join (seconds)
+DEFAULT_BATCH_WAIT = 0.01
+
+CONTENT_TYPES = {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg",
+                 "webp": "image/webp", "bmp": "image/bmp", "tiff": "image/tiff"}
+
+
+class MicroBatcher:
+    """Groups mask requests that arrive close together into one model call
+
+    One thread owns the model sessions: it takes the first waiting request,
+    lets others join for up to max_wait seconds (or until max_batch), then
+    runs each group that shares a model and proxy size through
+    core.predict_masks, stacked into one ONNX Runtime call.
+    """
+    def __init__(self, sessions, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_BATCH_WAIT):
+        self.sessions = sessions
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, img, model, proxy_size=None):
+        """Future resolving to the AI mask of an image"""
+        future = Future()
+        self._queue.put((img, model, proxy_size, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            groups = {}
+            for item in self._collect():
+                groups.setdefault(item[1:3], []).append(item)
+            for (model, proxy_size), items in groups.items():
+                self.batches += 1
+                self.items += len(items)
+                self._predict(model, proxy_size, items)
+
+    def _predict(self, model, proxy_size, items):
+        try:
+            session = self.sessions.get(model)
+            masks = core.predict_masks([item[0] for item in items], session, proxy_size,
+                                       batch_size=self.max_batch)
+        except Exception as e:
+            if len(items) == 1:
+                items[0][3].set_exception(e)
+                return
+            # Don't fail every request for one bad image: retry them one by one
+            for item in items:
+                self._predict(model, proxy_size, [item])
+            return
+        for item, mask in zip(items, masks):
+            item[3].set_result(mask)
+
+    @property
+    def mean_batch(self):
+        return self.items / self.batches if self.batches else 0.0
+
+
+class LatencyStats:
+    """Rolling request latencies with percentiles"""
+    def __init__(self, window=1000):
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.encode_seconds = 0.0
+        self.bytes_out = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok=True, encode_seconds=0.0, output_bytes=0):
+        with self._lock:
+            self.requests += 1
+            if ok:
+                self._latencies.append(seconds)
+                self.encode_seconds += encode_seconds
+                self.bytes_out += output_bytes
+            else:
+                self.errors += 1
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def percentile(self, percent):
+        with self._lock:
+            latencies = list(self._latencies)
+        return percentile(latencies, percent)
+
+
+class AuroraServer(ThreadingHTTPServer):
+    """HTTP server holding the shared sessions, batcher, cache and limits"""
+    daemon_threads = True
+
+    def __init__(self, address, sessions=None, cache=None, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 max_batch=DEFAULT_MAX_BATCH, batch_wait=DEFAULT_BATCH_WAIT, quiet=False):
+        super().__init__(address, RemoveHandler)
+        self.quiet = quiet
+        self.sessions = sessions or SessionCache()
+        self.cache = cache
+        self.batcher = MicroBatcher(self.sessions, max_batch, batch_wait)
+        self.stats = LatencyStats()
+        self.max_concurrent = max_concurrent
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+
+    def stats_json(self):
+        ok = self.stats.requests - self.stats.errors
+        return {
+            'requests': self.stats.requests,
+            'errors': self.stats.errors,
+            'rejected': self.stats.rejected,
+            'p50_seconds': round(self.stats.percentile(50), 4),
+            'p95_seconds': round(self.stats.percentile(95), 4),
+            'encode_seconds_mean': round(self.stats.encode_seconds / ok, 4) if ok else 0.0,
+            'bytes_out': self.stats.bytes_out,
+            'batches': self.batcher.batches,
+            'mean_batch_size': round(self.batcher.mean_batch, 2),
+            'models_loaded': [model for model in core.MODELS if model in self.sessions],
+            'stages': REGISTRY.snapshot()['stages'],
+        }
+
+    def metrics_text(self):
+        """Prometheus text: request counters plus the stage timings of aurora.metrics"""
+        counters = (("requests_total", "Requests received", self.stats.requests),
+                    ("request_errors_total", "Requests that failed", self.stats.errors),
+                    ("requests_rejected_total", "Requests turned away while busy",
+                     self.stats.rejected),
+                    ("output_bytes_total", "Bytes of images sent back", self.stats.bytes_out))
+        lines = []
+        for name, help_text, value in counters:
+            lines += [f"# HELP aurora_{name} {help_text}", f"# TYPE aurora_{name} counter",
+                      f"aurora_{name} {value}"]
+        return "\n".join(lines) + "\n" + REGISTRY.to_prometheus()
+
+
+def _flag(params, name):
+    return params.get(name, ['0'])[0].lower() in ('1', 'true', 'yes', 'on')
+
+
+def request_settings(params):
+    """BatchSettings from the query string of a /remove request, ValueError if invalid"""
+    model = params.get('model', ['u2net'])[0]
+    quality = params.get('quality', ['Ultra'])[0]
+    output_format = params.get('format', ['png'])[0].lower()
+    profile = params.get('profile', [core.DEFAULT_ENCODER_PROFILE])[0]
+    if model not in core.MODELS:
+        raise ValueError(f"unknown model {model!r}, one of {', '.join(core.MODELS)}")
+    if quality not in core.QUALITY_PRESETS:
+        raise ValueError(f"unknown quality {quality!r}, one of {', '.join(core.QUALITY_PRESETS)}")
+    if output_format not in core.OUTPUT_FORMATS:
+        raise ValueError(f"unknown format {output_format!r}, one of {', '.join(core.OUTPUT_FORMATS)}")
+    if profile not in core.ENCODER_PROFILES:
+        raise ValueError(f"unknown profile {profile!r}, one of {', '.join(core.ENCODER_PROFILES)}")
+    proxy_size = int(params.get('proxy', ['0'])[0]) or None
+    crop_threshold = int(params.get('crop_threshold', [DEFAULT_THRESHOLD])[0])
+    crop_padding = max(0, int(params.get('crop_padding', ['0'])[0]))
+    crop_aspect = parse_aspect(params.get('crop_aspect', [''])[0])
+    return BatchSettings(model=model, quality=quality, output_format=output_format,
+                         auto_crop=_flag(params, 'auto_crop'), crop_threshold=crop_threshold,
+                         crop_padding=crop_padding, crop_aspect=crop_aspect,
+                         enhance_edges=_flag(params, 'enhance_edges'),
+                         proxy_size=proxy_size, encoder_profile=profile)
+
+
+class RemoveHandler(BaseHTTPRequestHandler):
+    server_version = "AuroraBG/1.0"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif path == '/stats':
+            self._send_json(200, self.server.stats_json())
+        elif path == '/metrics':
+            body = self.server.metrics_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/remove':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        # Turn extra load away straight away instead of queueing it without bound
+        if not self.server.slots.acquire(blocking=False):
+            self.server.stats.reject()
+            self._send_json(503, {'error': 'busy, try again'}, {'Retry-After': '1'})
+            return
+
+        start = time.perf_counter()
+        try:
+            try:
+                settings = request_settings(parse_qs(url.query))
+                length = int(self.headers.get('Content-Length', 0))
+                if length <= 0:
+                    raise ValueError("send the image as the request body")
+                with timer("read"):
+                    input_data = self.rfile.read(length)
+            except ValueError as e:
+                self.server.stats.record(time.perf_counter() - start, ok=False)
+                self._send_json(400, {'error': str(e)})
+                return
+
+            try:
+                body, cached, encode_seconds = self._remove(input_data, settings)
+            except Exception as e:
+                self.server.stats.record(time.perf_counter() - start, ok=False)
+                self._send_json(500, {'error': str(e)})
+                return
+
+            seconds = time.perf_counter() - start
+            self.server.stats.record(seconds, encode_seconds=encode_seconds,
+                                     output_bytes=len(body))
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPES[settings.output_format])
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('X-Aurora-Seconds', f"{seconds:.3f}")
+            self.send_header('X-Aurora-Encode-Seconds', f"{encode_seconds:.3f}")
+            self.send_header('X-Aurora-Cached', '1' if cached else '0')
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            self.server.slots.release()
+
+    def _remove(self, input_data, settings):
+        cache = self.server.cache
+        key = settings_key(input_data, settings) if cache is not None else None
+        img = cache.get(key) if cache is not None else None
+        cached = img is not None
+        if not cached:
+            # Decode and finish on this thread, only the model runs on the batcher's
+            img = core.decode_image(input_data)
+            mask = self.server.batcher.submit(img, settings.model, settings.proxy_size).result()
+            img = finish_image(core.cut_out(img, mask, settings.quality), settings)
+            if cache is not None:
+                cache.put(key, img)
+        start = time.perf_counter()
+        body = core.encode_image(img, settings.output_format, settings.encoder_profile)
+        return body, cached, time.perf_counter() - start
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
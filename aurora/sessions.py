@@ -0,0 +1,99 @@
+"""Keeps recently used rembg sessions loaded so switching models does not reload from disk"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from . import core
+from .quantize import model_file
+
+
+# Roughly what u2net + silueta + u2netp take together, with room to spare
+DEFAULT_BUDGET_MB = 1024
+
+
+def session_size(model_name):
+    """Approximate memory held by a session: the size of its ONNX model file"""
+    try:
+        return os.path.getsize(model_file(model_name))
+    except Exception:
+        return 0
+
+
+class SessionCache:
+    """LRU cache of model sessions within a memory budget
+
+    Thread-safe: a model requested while it is still loading (e.g. by the
+    startup preload) waits for that load instead of starting a second one.
+    Sessions are created with runtime (RuntimeOptions), None for ONNX
+    Runtime's defaults, by loader(model_name, runtime), core.load_session
+    unless given (benchmarks pass a stub that needs no model files).
+    """
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, runtime=None, loader=None):
+        self.budget = budget_mb * 1024 * 1024
+        self.runtime = runtime
+        self.loader = loader or core.load_session
+        self.hits = 0
+        self.misses = 0
+        self._sessions = OrderedDict()   # model name -> (session, size in bytes)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def __contains__(self, model_name):
+        with self._lock:
+            return model_name in self._sessions
+
+    def get(self, model_name):
+        """Session for a model, loading it (and evicting old ones) on a miss"""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if model_name in self._sessions:
+                    self.hits += 1
+                    self._sessions.move_to_end(model_name)
+                    return self._sessions[model_name][0]
+                self.misses += 1
+
+            session = self.loader(model_name, self.runtime)
+            size = session_size(model_name)
+
+            with self._lock:
+                self._sessions[model_name] = (session, size)
+                self._evict()
+            return session
+
+    def _evict(self):
+        # Always keep the most recent session, even if it alone is over budget
+        while len(self._sessions) > 1 and self.memory > self.budget:
+            self._sessions.popitem(last=False)
+
+    def set_runtime(self, runtime):
+        """Use other RuntimeOptions from now on, dropping sessions made with the old ones"""
+        with self._lock:
+            if runtime == self.runtime:
+                return
+            self.runtime = runtime
+            self._sessions.clear()
+
+    @property
+    def memory(self):
+        return sum(size for _, size in self._sessions.values())
+
+    def preload(self, model_name):
+        """Load a model on a background thread so the first request finds it warm"""
+        thread = threading.Thread(target=self._preload, args=(model_name,), daemon=True)
+        thread.start()
+        return thread
+
+    def _preload(self, model_name):
+        try:
+            self.get(model_name)
+        except Exception as e:
+            print(f"Could not preload {model_name}: {e}")
+
+    def stats_text(self):
+        with self._lock:
+            loaded = ", ".join(self._sessions) or "none"
+        return f"🧠 Models: {loaded} • Cache Hits: {self.hits} / Misses: {self.misses}"
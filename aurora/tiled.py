@@ -0,0 +1,189 @@
+"""Large-image mode: cut out huge scans strip by strip so memory stays bounded
+
+The model and alpha matting run on a proxy (see aurora.proxy). The alpha is
+then upsampled, composited, edge-sharpened and written one strip of rows at
+a time, straight into a streaming PNG encoder. Apart from the decoded input,
+memory stays at a few strips whatever the image size.
+"""
+
+import struct
+import time
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from . import core
+from .autocrop import DEFAULT_THRESHOLD, fit_box, subject_bbox, union_box
+from .metrics import REGISTRY
+from .proxy import apply_coefficients, guide_coefficients, make_proxy, proxy_dims
+
+
+# Images with more pixels than this go through large-image mode in batches
+LARGE_IMAGE_PIXELS = 50_000_000
+# Proxy size used when the batch doesn't set one
+LARGE_PROXY_SIZE = 2048
+STRIP_HEIGHT = 256
+# Extra rows around each strip so edge sharpening sees the same neighbours as on the whole image
+HALO = 8
+
+PNG_COLOR_TYPES = {'L': 0, 'RGB': 2, 'LA': 4, 'RGBA': 6}
+
+
+def image_pixels(file_path):
+    """Pixel count of an image file from its header, without decoding it"""
+    with Image.open(file_path) as img:
+        return img.width * img.height
+
+
+def is_large(file_path, threshold=LARGE_IMAGE_PIXELS):
+    """Whether a file should go through large-image mode, False if it can't be read"""
+    if not threshold:
+        return False
+    try:
+        return image_pixels(file_path) > threshold
+    except Exception:
+        # Let the normal path report unreadable files
+        return False
+
+
+class PNGStripWriter:
+    """PNG encoder fed one strip of rows at a time, never holding the whole image
+
+    Rows use PNG's Sub filter and go through a single zlib stream, so only
+    the compressed output accumulates (on disk). seconds adds up the time
+    spent encoding.
+    """
+    def __init__(self, f, width, height, mode='RGBA', compress_level=6):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.channels = len(mode)
+        self.rows = 0
+        self.seconds = 0.0
+        self._zlib = zlib.compressobj(compress_level)
+        f.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+                                         PNG_COLOR_TYPES[mode], 0, 0, 0))
+
+    def write(self, rows):
+        """Append rows, a uint8 array of shape (h, width, channels)"""
+        start = time.perf_counter()
+        rows = rows.reshape(rows.shape[0], self.width * self.channels)
+        c = self.channels
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 1   # Sub: each byte minus the one a pixel to its left
+        filtered[:, 1:c + 1] = rows[:, :c]
+        np.subtract(rows[:, c:], rows[:, :-c], out=filtered[:, c + 1:])
+        self.rows += rows.shape[0]
+        data = self._zlib.compress(filtered)
+        if data:
+            self._chunk(b'IDAT', data)
+        self.seconds += time.perf_counter() - start
+
+    def close(self):
+        if self.rows != self.height:
+            raise ValueError(f"wrote {self.rows} of {self.height} PNG rows")
+        start = time.perf_counter()
+        self._chunk(b'IDAT', self._zlib.flush())
+        self._chunk(b'IEND', b'')
+        self.seconds += time.perf_counter() - start
+
+    def _chunk(self, tag, data):
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(tag)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(tag))))
+
+
+class StripCutout:
+    """Final cut-out rows of a large image, computed on demand from proxy results"""
+    def __init__(self, img, session, quality="Ultra", enhance_edges=False, proxy_size=None):
+        # Kept in its own mode: strips are converted to RGB one at a time, so a
+        # second full-size copy of a huge image is never made
+        self.img = img
+        self.enhance_edges = enhance_edges
+        proxy_size = min(proxy_size or LARGE_PROXY_SIZE, max(img.size))
+        proxy = make_proxy(img, proxy_dims(img.size, proxy_size))
+        mask = core.predict_mask(proxy, session)
+        alpha = core.cut_out(proxy, mask, quality).getchannel('A')
+        self.coefficients = guide_coefficients(alpha, proxy)
+
+    @property
+    def size(self):
+        return self.img.size
+
+    def rows(self, top, bottom):
+        """RGBA image of rows top to bottom, as they'd be cut from the whole image"""
+        width, height = self.img.size
+        halo = HALO if self.enhance_edges else 0
+        start, end = max(0, top - halo), min(height, bottom + halo)
+        strip = self.img.crop((0, start, width, end))
+        if strip.mode != 'RGB':
+            strip = strip.convert('RGB')
+        alpha = apply_coefficients(self.coefficients, strip, self.img.size, (start, end))
+        strip = strip.convert('RGBA')
+        strip.putalpha(alpha)
+        if self.enhance_edges:
+            strip = core.enhance_edges(strip).crop((0, top - start, width, bottom - start))
+        return strip
+
+    def strips(self, top=0, bottom=None, strip_height=STRIP_HEIGHT):
+        """(top row, RGBA strip) pairs covering rows top to bottom"""
+        bottom = self.img.height if bottom is None else bottom
+        for y in range(top, bottom, strip_height):
+            yield y, self.rows(y, min(y + strip_height, bottom))
+
+    def bbox(self, strip_height=STRIP_HEIGHT, threshold=DEFAULT_THRESHOLD):
+        """Bounding box of the pixels with alpha above threshold, the whole image if none are"""
+        box = None
+        for y, strip in self.strips(strip_height=strip_height):
+            found = subject_bbox(strip, threshold)
+            if found is not None:
+                left, top, right, bottom = found
+                box = union_box(box, (left, y + top, right, y + bottom))
+        return box or (0, 0) + self.img.size
+
+
+def process_large(file_path, save_path, session, settings, strip_height=STRIP_HEIGHT):
+    """Remove the background of a large image with bounded memory
+
+    Follows the batch settings (quality, edges, crop, format, proxy size,
+    encoder profile). PNG output is streamed strip by strip; other formats
+    need the whole cut-out in memory for PIL's encoders and are assembled
+    first. Returns the seconds spent encoding.
+    """
+    cutout = StripCutout(core.load_image(file_path), session, settings.quality,
+                         settings.enhance_edges, settings.proxy_size)
+    # Auto-crop needs the extent of the subject before writing: one extra pass
+    left, top, right, bottom = (0, 0) + cutout.size
+    if settings.auto_crop:
+        left, top, right, bottom = fit_box(cutout.bbox(strip_height, settings.crop_threshold),
+                                           cutout.size, settings.crop_padding,
+                                           settings.crop_aspect)
+    # Padding and the aspect ratio can reach past the image: transparent rows there
+    first, last = max(top, 0), min(bottom, cutout.size[1])
+
+    if settings.output_format.lower() != 'png':
+        img = Image.new('RGBA', (right - left, bottom - top))
+        for y, strip in cutout.strips(first, last, strip_height):
+            img.paste(strip.crop((left, 0, right, strip.height)), (0, y - top))
+        start = time.perf_counter()
+        core.save_image(img, save_path, settings.output_format, settings.encoder_profile)
+        return time.perf_counter() - start
+
+    # optimize (the 'smallest' profile) has no streaming equivalent, take the best zlib level
+    level = core.encoder_options('png', settings.encoder_profile).get('compress_level', 9)
+    with open(save_path, 'wb') as f:
+        writer = PNGStripWriter(f, right - left, bottom - top, compress_level=level)
+        blank = np.zeros((strip_height, right - left, 4), dtype=np.uint8)
+        for y in range(top, first, strip_height):
+            writer.write(blank[:min(strip_height, first - y)])
+        for _, strip in cutout.strips(first, last, strip_height):
+            writer.write(np.asarray(strip.crop((left, 0, right, strip.height))))
+        for y in range(last, bottom, strip_height):
+            writer.write(blank[:min(strip_height, bottom - y)])
+        writer.close()
+    # Writes to the file are interleaved with the encoding, both count as encode
+    REGISTRY.record("encode", writer.seconds)
+    return writer.seconds
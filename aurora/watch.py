@@ -0,0 +1,144 @@
+"""Watch-folder mode: feed images into the batch pipeline as they appear in a folder"""
+
+import os
+import statistics
+import time
+from collections import deque
+from pathlib import Path
+
+from .batch import iter_batch, list_images
+from .manifest import BatchManifest
+from .metrics import percentile
+from .sessions import SessionCache
+
+
+# A file must keep the same size and mtime this long before it is picked up (seconds)
+DEFAULT_SETTLE = 2.0
+DEFAULT_INTERVAL = 1.0
+
+
+class WatchStats:
+    """Backlog and arrival-to-output latency of a watch run"""
+    def __init__(self, window=200):
+        self.backlog = 0
+        self.processed = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, result, latency):
+        if result.ok:
+            self.processed += 1
+            self.latencies.append(latency)
+        else:
+            self.errors += 1
+
+    def latency_percentile(self, percent):
+        return percentile(self.latencies, percent)
+
+    def summary(self):
+        mean = statistics.mean(self.latencies) if self.latencies else 0.0
+        return (f"👀 Backlog: {self.backlog} • Processed: {self.processed} • "
+                f"Errors: {self.errors} • Latency avg {mean:.1f}s / "
+                f"p95 {self.latency_percentile(95):.1f}s")
+
+
+class FolderWatcher:
+    """Polls a folder for images that are new or changed and done being written
+
+    A file is ready once its size and mtime have stayed the same for settle
+    seconds, so half-copied files are left alone. Files the manifest lists
+    as done are skipped; when only the mtime moved, the content hash decides.
+    A file that failed is retried only after it changes again.
+    """
+    def __init__(self, input_dir, manifest, settle=DEFAULT_SETTLE):
+        self.input_dir = input_dir
+        self.manifest = manifest
+        self.settle = settle
+        self._seen = {}        # path -> ((size, mtime), monotonic time first seen so)
+        self._attempted = {}   # path -> (size, mtime) when last handed out
+
+    def poll(self):
+        """Ready files, and how many more are still being written"""
+        now = time.monotonic()
+        ready = []
+        waiting = 0
+        current = set()
+        for file_path in list_images([self.input_dir]):
+            name = Path(file_path)
+            # Hidden temp files of copy tools, and our own outputs if written back here
+            if name.name.startswith('.') or name.stem.endswith("_aurora_no_bg"):
+                continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime)
+            current.add(file_path)
+            if self._attempted.get(file_path) == signature:
+                continue
+
+            seen = self._seen.get(file_path)
+            if seen is None or seen[0] != signature:
+                self._seen[file_path] = (signature, now)
+                waiting += 1
+                continue
+            if now - seen[1] < self.settle or stat.st_size == 0:
+                waiting += 1
+                continue
+
+            self._attempted[file_path] = signature
+            if not self.manifest.is_done(file_path, check_hash=True):
+                ready.append(file_path)
+
+        # Forget files that were deleted
+        for file_path in set(self._seen) - current:
+            del self._seen[file_path]
+            self._attempted.pop(file_path, None)
+        return ready, waiting
+
+
+def watch_folder(input_dir, output_dir, settings, sessions=None, workers=1, cache=None,
+                 control=None, stats=None, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE):
+    """Process images arriving in input_dir until control (a BatchControl) is cancelled
+
+    Yields a BatchResult per processed file. Every poll that finds ready files
+    runs them through iter_batch as one small batch; with one worker the model
+    session stays loaded in sessions between polls, with more a worker pool is
+    started per burst. Progress goes to the output folder's manifest, so a
+    restarted watch picks up where the last one stopped. Pass a WatchStats as
+    stats to follow the backlog and latency.
+    """
+    if sessions is None:
+        sessions = SessionCache(runtime=settings.runtime)
+    if stats is None:
+        stats = WatchStats()
+    manifest = BatchManifest(output_dir, settings)
+    watcher = FolderWatcher(input_dir, manifest, settle)
+
+    try:
+        while control is None or not control.cancelled:
+            if control is not None and control.paused:
+                time.sleep(interval)
+                continue
+
+            ready, waiting = watcher.poll()
+            stats.backlog = len(ready) + waiting
+            if not ready:
+                manifest.save()
+                time.sleep(interval)
+                continue
+
+            for result in iter_batch(ready, output_dir, settings, sessions=sessions,
+                                     workers=workers, cache=cache, control=control):
+                manifest.record(result)
+                try:
+                    # Latency from when the file landed in the folder
+                    latency = time.time() - os.path.getmtime(result.file_path)
+                except OSError:
+                    latency = 0.0
+                stats.record(result, latency)
+                stats.backlog = max(0, stats.backlog - 1)
+                yield result
+    finally:
+        manifest.save()
+
@@ -0,0 +1 @@
+"""Performance benchmarks, run from the repository root as `python -m benchmarks.<name>`"""
@@ -0,0 +1,54 @@
+"""Model throughput with several images stacked into one ONNX Runtime call
+
+    python -m benchmarks.batch_inference [--models u2net,u2netp] [--batch-sizes 1,4,8,16]
+                                         [--images 32] [--size 1024x768] [--repeat 3]
+
+Times aurora.core.predict_masks over --images synthetic photos at each batch
+size; batch size 1 is the old one-remove()-per-image path. Preprocessing and
+mask resizing are included, decoding and cut-out are not.
+"""
+
+import argparse
+import statistics
+import time
+
+from aurora import core
+from aurora.inference import supports_batches
+from benchmarks.matting import synthetic_photo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", default="u2net,u2netp")
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--size", default="1024x768")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    images = [synthetic_photo(width, height, seed=i)[0] for i in range(args.images)]
+    print(f"🖼️ {args.images} images of {width}x{height}, median of {args.repeat} runs")
+    print(f"{'model':>8} {'batch':>6} {'images/s':>9} {'ms/image':>9} {'speed-up':>9}")
+
+    for model in args.models.split(','):
+        session = core.load_session(model)
+        if not supports_batches(session):
+            print(f"{model:>8}  model has a fixed batch size of 1, skipped")
+            continue
+        core.predict_masks(images[:2], session, batch_size=2)   # warm-up
+        baseline = None
+        for batch_size in (int(v) for v in args.batch_sizes.split(',')):
+            runs = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                core.predict_masks(images, session, batch_size=batch_size)
+                runs.append(time.perf_counter() - start)
+            seconds = statistics.median(runs)
+            baseline = baseline or seconds
+            print(f"{model:>8} {batch_size:>6} {args.images / seconds:9.2f} "
+                  f"{seconds / args.images * 1000:9.1f} {baseline / seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
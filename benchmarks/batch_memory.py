@@ -0,0 +1,144 @@
+"""Memory over a long batch: resident memory sampled from the first file to the last
+
+    python -m benchmarks.batch_memory [--files 5000] [--distinct 8] [--size 1600x1200]
+                                      [--budgets 0,400] [--batch-size 1] [--writers 2]
+                                      [--model stub] [--quality Standard] [--format png]
+                                      [--stub-ms 0]
+
+--distinct synthetic photos from benchmarks.suite are hard-linked under
+--files names, so a 50,000-file batch needs no more disk than a handful of
+images. Each budget (--memory-mb of the CLI, 0 for no cap) runs in a fresh
+process that sends every file through iter_batch with one worker and no
+result cache, records it in the batch manifest like the CLI does and deletes
+the output straight away. Resident memory is sampled every 1% of the files;
+the peak (VmHWM) and the growth over the second half of the run are
+reported. Memory is flat when that growth stays under --tolerance MB; the
+manifest keeps one small entry per file, which is the only thing meant to
+grow with the file count. Linux/macOS only (resource).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+
+from aurora import core
+from aurora.batch import BatchSettings, iter_batch, list_images
+from aurora.manifest import BatchManifest
+from aurora.memory import rss_mb
+from aurora.sessions import SessionCache
+from benchmarks.large_image import peak_rss_mb
+from benchmarks.suite import COMPLEXITIES, load_session, synthetic_image
+
+
+def write_inputs(directory, files, distinct, width, height):
+    """distinct photos, hard-linked (or copied) until there are files of them"""
+    sources = []
+    for n in range(distinct):
+        path = os.path.join(directory, f"source_{n}.jpg")
+        synthetic_image(width, height, COMPLEXITIES[n % len(COMPLEXITIES)], seed=n).save(
+            path, 'JPEG', quality=92)
+        sources.append(path)
+    for n in range(files):
+        path = os.path.join(directory, f"img_{n:06d}.jpg")
+        try:
+            os.link(sources[n % distinct], path)
+        except OSError:
+            shutil.copyfile(sources[n % distinct], path)
+    for path in sources:
+        os.remove(path)
+
+
+def child(config):
+    files = list_images([config['inputs']])
+    settings = BatchSettings(model=config['model'], quality=config['quality'],
+                             output_format=config['format'], batch_size=config['batch_size'],
+                             writers=config['writers'],
+                             memory_budget_mb=config['budget_mb'] or None)
+    sessions = SessionCache(loader=partial(load_session, delay=config['stub_ms'] / 1000))
+    sessions.get(config['model'])
+    every = max(1, len(files) // 100)
+    samples = []
+    errors = 0
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        manifest = BatchManifest(output_dir, settings)
+        start = time.perf_counter()
+        for n, result in enumerate(iter_batch(files, output_dir, settings, sessions=sessions),
+                                   1):
+            manifest.record(result)
+            if result.ok:
+                os.remove(result.save_path)
+            else:
+                errors += 1
+            if n % every == 0 or n == len(files):
+                samples.append((n, rss_mb()))
+        seconds = time.perf_counter() - start
+        manifest.save()
+
+    half = samples[len(samples) // 2][1]
+    print(json.dumps({'images': len(files), 'errors': errors, 'seconds': round(seconds, 2),
+                      'peak_rss_mb': round(peak_rss_mb(), 1),
+                      'rss_mid_mb': round(half, 1), 'rss_end_mb': round(samples[-1][1], 1),
+                      'growth_mb': round(samples[-1][1] - half, 1),
+                      'samples': [(n, round(rss, 1)) for n, rss in samples]}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=8, help="different photos among them")
+    parser.add_argument("--size", default="1600x1200")
+    parser.add_argument("--budgets", default="0,400",
+                        help="memory budgets in MB to compare, 0 for no cap")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--model", default="stub",
+                        help="'stub' needs no model files (see benchmarks.suite)")
+    parser.add_argument("--quality", default="Standard")
+    parser.add_argument("--format", default="png", choices=core.OUTPUT_FORMATS)
+    parser.add_argument("--stub-ms", type=float, default=0.0)
+    parser.add_argument("--tolerance", type=float, default=20.0,
+                        help="growth over the second half still counted as flat, in MB")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(json.loads(args.child))
+        return
+
+    if rss_mb() is None:
+        sys.exit("❌ Can't read the resident memory of a process on this system")
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    with tempfile.TemporaryDirectory() as inputs:
+        write_inputs(inputs, args.files, min(args.distinct, args.files), width, height)
+        print(f"🧪 {args.files} files ({args.distinct} distinct, {width}x{height}) • "
+              f"model {args.model} • {args.quality} • {args.format} • "
+              f"batch size {args.batch_size}")
+        print(f"{'budget':>8} {'images/s':>9} {'peak':>8} {'at 50%':>8} {'at 100%':>8} "
+              f"{'growth':>8}  verdict")
+        for budget in (float(b) for b in args.budgets.split(',')):
+            config = {'inputs': inputs, 'model': args.model, 'quality': args.quality,
+                      'format': args.format, 'batch_size': args.batch_size,
+                      'writers': args.writers, 'budget_mb': budget, 'stub_ms': args.stub_ms}
+            out = subprocess.run([sys.executable, '-m', 'benchmarks.batch_memory', '--child',
+                                  json.dumps(config)], capture_output=True, text=True)
+            if out.returncode:
+                print(f"{budget:6.0f}MB  failed: "
+                      f"{out.stderr.strip().splitlines()[-1] if out.stderr else '?'}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            flat = r['growth_mb'] <= args.tolerance
+            errors = f" ({r['errors']} errors)" if r['errors'] else ""
+            print(f"{'off' if not budget else f'{budget:.0f}MB':>8} "
+                  f"{r['images'] / r['seconds']:9.2f} {r['peak_rss_mb']:6.0f}MB "
+                  f"{r['rss_mid_mb']:6.0f}MB {r['rss_end_mb']:6.0f}MB "
+                  f"{r['growth_mb']:+6.1f}MB  {'✅ flat' if flat else '⚠️ growing'}{errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Encode time and output size of each encoder profile, per output format
+
+    python -m benchmarks.encoders [--formats png,jpg,webp,tiff] [--images DIR]
+                                  [--size 2000x1500] [--repeat 3] [--writers 1,4]
+
+Encodes RGBA cut-outs (synthetic, or the images in --images converted to
+RGBA) with core.save_image under every profile in core.ENCODER_PROFILES.
+With --writers, the same set is also encoded by a thread pool of that size
+to show how encodes overlap, as in the batch writer pool.
+"""
+
+import argparse
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aurora import core
+from aurora.batch import list_images
+from benchmarks.png_roundtrip import synthetic_cutout
+
+
+def encode(img, output_format, profile):
+    buf = io.BytesIO()
+    start = time.perf_counter()
+    core.save_image(img, buf, output_format, profile)
+    return time.perf_counter() - start, buf.tell()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--formats", default="png,jpg,webp,tiff")
+    parser.add_argument("--images", help="folder of test images (default: synthetic)")
+    parser.add_argument("--size", default="2000x1500")
+    parser.add_argument("--count", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--writers", default="1")
+    args = parser.parse_args(argv)
+
+    if args.images:
+        images = [core.load_image(path).convert('RGBA') for path in list_images([args.images])]
+    else:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+        images = [synthetic_cutout(width, height, seed=i) for i in range(args.count)]
+    print(f"🖼️ {len(images)} RGBA images • median of {args.repeat} runs")
+    print(f"{'format':>6} {'profile':>9} {'ms/image':>9} {'MB/image':>9} {'vs balanced':>12}")
+
+    for output_format in args.formats.split(','):
+        results = {}
+        for profile in core.ENCODER_PROFILES:
+            times, sizes = [], []
+            for img in images:
+                runs = [encode(img, output_format, profile) for _ in range(args.repeat)]
+                times.append(statistics.median(seconds for seconds, _ in runs))
+                sizes.append(runs[0][1])
+            results[profile] = (statistics.mean(times), statistics.mean(sizes))
+        base_time, base_size = results[core.DEFAULT_ENCODER_PROFILE]
+        for profile, (seconds, size) in results.items():
+            print(f"{output_format:>6} {profile:>9} {seconds * 1000:9.1f} {size / 1e6:9.2f} "
+                  f"{base_time / seconds:5.2f}x {size / base_size:5.2f}x")
+
+    for writers in (int(v) for v in args.writers.split(',')):
+        if writers <= 1:
+            continue
+        for output_format in args.formats.split(','):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(writers) as pool:
+                list(pool.map(lambda img: encode(img, output_format, core.DEFAULT_ENCODER_PROFILE),
+                              images))
+            pooled = time.perf_counter() - start
+            start = time.perf_counter()
+            for img in images:
+                encode(img, output_format, core.DEFAULT_ENCODER_PROFILE)
+            serial = time.perf_counter() - start
+            print(f"🧵 {output_format} with {writers} writers: {len(images) / pooled:.2f} images/s "
+                  f"vs {len(images) / serial:.2f} serial ({serial / pooled:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
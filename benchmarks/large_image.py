@@ -0,0 +1,113 @@
+"""Peak memory of large images: whole-image cut-out vs large-image (strip) mode
+
+    python -m benchmarks.large_image [--sizes 2000x2000,4000x4000,8000x8000]
+                                     [--images DIR] [--model u2netp] [--quality High]
+                                     [--proxy 2048] [--enhance-edges]
+
+Each image is processed in a fresh child process, once through the regular
+path (load, run_model with the same proxy size, finish, save) and once
+through aurora.tiled.process_large, both writing PNG. The child reports its
+peak resident memory (VmHWM, or ru_maxrss off Linux) and how much of it the image added on top
+of the loaded model. In strip mode that growth should track the decoded
+input (3 bytes per pixel) plus a few strips, the regular path adds several
+full-size copies. Without --images synthetic photos of --sizes are written
+as uncompressed TIFFs to a temporary folder. Linux/macOS only (resource).
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from aurora import core
+from aurora.batch import BatchSettings, finish_image, list_images
+from aurora.tiled import process_large
+from benchmarks.matting import synthetic_photo
+
+
+def peak_rss_mb():
+    # VmHWM starts afresh at exec, ru_maxrss can carry over the parent's peak from the fork
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def child(mode, path, args):
+    settings = BatchSettings(model=args.model, quality=args.quality,
+                             enhance_edges=args.enhance_edges, proxy_size=args.proxy)
+    session = core.load_session(args.model)
+    base = peak_rss_mb()
+    save_path = os.path.join(tempfile.gettempdir(), f"aurora_large_{os.getpid()}.png")
+    start = time.perf_counter()
+    if mode == 'tiled':
+        process_large(path, save_path, session, settings)
+    else:
+        img = core.run_model(core.load_image(path), session, settings.quality, settings.proxy_size)
+        core.save_image(finish_image(img, settings), save_path, 'png')
+    seconds = time.perf_counter() - start
+    os.remove(save_path)
+    print(json.dumps({'base': base, 'peak': peak_rss_mb(), 'seconds': seconds}))
+
+
+def measure(mode, path, argv):
+    out = subprocess.run([sys.executable, '-m', 'benchmarks.large_image', '--child', mode, path]
+                         + argv, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="2000x2000,4000x4000,8000x8000")
+    parser.add_argument("--images", help="folder of large test images (default: synthetic)")
+    parser.add_argument("--model", default="u2netp")
+    parser.add_argument("--quality", default="High")
+    parser.add_argument("--proxy", type=int, default=2048)
+    parser.add_argument("--enhance-edges", action="store_true")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(*args.child, args)
+        return
+
+    # Options the child processes need, without --sizes/--images
+    child_argv = ["--model", args.model, "--quality", args.quality, "--proxy", str(args.proxy)]
+    if args.enhance_edges:
+        child_argv.append("--enhance-edges")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.images:
+            paths = list_images([args.images])
+        else:
+            paths = []
+            for size in args.sizes.split(','):
+                width, height = (int(v) for v in size.lower().split('x'))
+                path = os.path.join(tmp, f"synthetic_{size}.tiff")
+                synthetic_photo(width, height)[0].save(path)
+                paths.append(path)
+
+        print(f"🗺️ {args.model} • {args.quality} • proxy {args.proxy}px"
+              f"{' • edges' if args.enhance_edges else ''} • peak RSS per child process")
+        print(f"{'image':>28} {'pixels':>8} {'mode':>6} {'peak':>9} {'image':>9} {'time':>8}")
+        for path in paths:
+            pixels = core.load_image(path).size
+            megapixels = pixels[0] * pixels[1] / 1e6
+            for mode in ('whole', 'tiled'):
+                r = measure(mode, path, child_argv)
+                print(f"{os.path.basename(path)[-28:]:>28} {megapixels:6.1f}MP {mode:>6} "
+                      f"{r['peak']:7.0f}MB {r['peak'] - r['base']:7.0f}MB {r['seconds']:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
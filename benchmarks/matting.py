@@ -0,0 +1,113 @@
+"""Alpha matting engines compared: time and peak RSS at several resolutions
+
+    python -m benchmarks.matting [--sizes 1000x750,2000x1500,4000x3000] [--engines banded,rembg]
+
+"banded" is the Fast Ultra engine (aurora.matting), "rembg" the whole-image
+solver used by High/Ultra. Both run with the Ultra thresholds. Every run
+happens in a fresh process so the reported peak RSS is its own (Unix only).
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+
+ENGINES = ("banded", "rembg")
+
+
+def synthetic_photo(width, height, seed=0):
+    """Textured photo with a wobbly subject, and a soft mask like the model's"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    angle = np.arctan2(y - height / 2, x - width / 2)
+    radius = np.hypot((x - width / 2) / width, (y - height / 2) / height)
+    edge = 0.33 + 0.03 * np.sin(angle * 9) + 0.01 * np.sin(angle * 37)
+    inside = np.clip((edge - radius) * 400, 0, 1)
+
+    background = np.stack([x / width * 200, y / height * 200, np.full_like(x, 90)], axis=-1)
+    subject = np.array([230, 190, 60], dtype=np.float32)
+    rgb = background * (1 - inside[..., None]) + subject * inside[..., None]
+    rgb += rng.normal(0, 8, rgb.shape)
+    img = Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), 'RGB')
+    mask = Image.fromarray((inside * 255).astype(np.uint8), 'L')
+    return img, mask
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(engine, image_path, mask_path):
+    from rembg.bg import alpha_matting_cutout
+    from aurora.matting import banded_matting_cutout
+
+    cutout = banded_matting_cutout if engine == "banded" else alpha_matting_cutout
+    # Compile pymatting's numba kernels before timing
+    cutout(*synthetic_photo(160, 120), 240, 10, 10)
+
+    # Inputs come from disk so generating them doesn't set the RSS high-water mark
+    img, mask = Image.open(image_path), Image.open(mask_path)
+    img.load()
+    mask.load()
+    base = peak_rss_mb()
+    start = time.perf_counter()
+    cutout(img, mask, 240, 10, 10)
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'peak_rss_mb': peak_rss_mb(), 'base_rss_mb': base}))
+
+
+def run_engine(engine, size, image_path, mask_path):
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.matting",
+                           "--child", engine, image_path, mask_path],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        # Typically the OOM killer on the whole-image solver
+        print(f"{size:>11} {engine:>7}   failed (exit code {proc.returncode})")
+        return
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(f"{size:>11} {engine:>7} {result['seconds']:8.2f}s "
+          f"{result['peak_rss_mb']:8.0f}MB "
+          f"{result['peak_rss_mb'] - result['base_rss_mb']:10.0f}MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000x750,2000x1500,4000x3000")
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    parser.add_argument("--make", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(*args.child)
+        return
+    if args.make:
+        width, height = (int(v) for v in args.make[0].split('x'))
+        img, mask = synthetic_photo(width, height)
+        img.save(os.path.join(args.make[1], "photo.png"), compress_level=1)
+        mask.save(os.path.join(args.make[1], "mask.png"), compress_level=1)
+        return
+
+    print(f"{'size':>11} {'engine':>7} {'time':>9} {'peak RSS':>10} {'matting RSS':>12}")
+    for size in args.sizes.split(','):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Generated in a child too: Linux children inherit the parent's RSS high-water mark
+            subprocess.run([sys.executable, "-m", "benchmarks.matting", "--make", size, tmp],
+                           check=True)
+            image_path, mask_path = os.path.join(tmp, "photo.png"), os.path.join(tmp, "mask.png")
+            for engine in args.engines.split(','):
+                run_engine(engine, size, image_path, mask_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-image cost of the PNG round-trip that used to sit between remove() and PIL
+
+    python -m benchmarks.png_roundtrip [--size 4000x3000] [--repeat 5] [--model u2netp]
+
+Without --model only the round-trip itself is timed (PNG encode inside rembg
+plus our decode), which is exactly the work the PIL-in/PIL-out path skips.
+With --model the whole remove() call is timed both ways on a real session.
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_cutout(width, height, seed=0):
+    """Photo-like RGBA cut-out: noisy texture inside a soft-edged ellipse"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    rgb = np.stack([x / width * 255, y / height * 255, np.full_like(x, 128)], axis=-1)
+    rgb += rng.normal(0, 12, rgb.shape)
+    dist = ((x - width / 2) / (width * 0.4)) ** 2 + ((y - height / 2) / (height * 0.4)) ** 2
+    alpha = np.clip((1.1 - dist) * 10, 0, 1) * 255
+    rgba = np.dstack([np.clip(rgb, 0, 255), alpha]).astype(np.uint8)
+    return Image.fromarray(rgba, 'RGBA')
+
+
+def png_roundtrip(img):
+    """What the bytes-in/bytes-out path did: rembg encodes PNG, we decode it again"""
+    buf = io.BytesIO()
+    start = time.perf_counter()
+    img.save(buf, "PNG")
+    encoded = time.perf_counter()
+    decoded = Image.open(io.BytesIO(buf.getvalue()))
+    decoded.load()
+    return encoded - start, time.perf_counter() - encoded
+
+
+def time_remove(model, img, repeat):
+    from rembg import remove, new_session
+
+    session = new_session(model)
+    buf = io.BytesIO()
+    img.convert('RGB').save(buf, "JPEG", quality=95)
+    input_data = buf.getvalue()
+    photo = Image.open(io.BytesIO(input_data))
+    photo.load()
+
+    bytes_path, pil_path = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Image.open(io.BytesIO(remove(input_data, session=session))).load()
+        bytes_path.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        remove(photo, session=session)
+        pil_path.append(time.perf_counter() - start)
+    return statistics.median(bytes_path), statistics.median(pil_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="4000x3000", help="WIDTHxHEIGHT (default 12 MP)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", help="also time remove() end to end with this model")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    img = synthetic_cutout(width, height)
+    print(f"🖼️ {width}x{height} RGBA ({width * height / 1e6:.1f} MP), {args.repeat} runs")
+
+    runs = [png_roundtrip(img) for _ in range(args.repeat)]
+    encode = statistics.median(r[0] for r in runs)
+    decode = statistics.median(r[1] for r in runs)
+    print(f"  PNG encode in remove():  {encode * 1000:8.1f} ms")
+    print(f"  PNG decode afterwards:   {decode * 1000:8.1f} ms")
+    print(f"  ⚡ saved per image:       {(encode + decode) * 1000:8.1f} ms")
+
+    if args.model:
+        bytes_time, pil_time = time_remove(args.model, img, args.repeat)
+        print(f"  remove() bytes in/out:   {bytes_time * 1000:8.1f} ms")
+        print(f"  remove() PIL in/out:     {pil_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
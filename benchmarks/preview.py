@@ -0,0 +1,102 @@
+"""Preview path of the app: fit a cut-out to the canvas and show it over a checkerboard
+
+    python -m benchmarks.preview [--size 4000x3000] [--windows 520x300,1040x600,1920x1080]
+                                 [--photo-size 7728x5152] [--repeat 5]
+
+"before" is the old path: a full LANCZOS resize, a checkerboard drawn square
+by square with ImageDraw, then a masked paste. "after" is
+aurora.preview.composite_preview, whose checkerboard is built once per size
+with NumPy and cached, so repeated previews at one size only pay the resize
+and a single alpha blend.
+
+The loader section times opening a photo for the "Original" panel (40 MP
+by default) as JPEG and TIFF: a full decode plus resize before, and
+aurora.preview.load_preview (JPEG draft decoding, reduce) after.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from aurora import preview
+from benchmarks.png_roundtrip import synthetic_cutout
+
+
+def legacy_preview(image, max_width, max_height):
+    ratio = min(max_width / image.width, max_height / image.height)
+    resized = image.resize((int(image.width * ratio), int(image.height * ratio)),
+                           Image.Resampling.LANCZOS)
+    checkered = Image.new('RGB', resized.size, '#0a0015')
+    draw = ImageDraw.Draw(checkered)
+    for y in range(0, resized.height, 15):
+        for x in range(0, resized.width, 15):
+            if (x // 15 + y // 15) % 2 == 0:
+                draw.rectangle([x, y, x + 15, y + 15], fill='#1a0a2a')
+    checkered.paste(resized, (0, 0), resized)
+    return checkered
+
+
+def legacy_load(file_path):
+    img = Image.open(file_path)
+    ratio = min(520 / img.width, 300 / img.height)
+    return img.resize((int(img.width * ratio), int(img.height * ratio)), Image.Resampling.LANCZOS)
+
+
+def median_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="4000x3000", help="cut-out WIDTHxHEIGHT (default 12 MP)")
+    parser.add_argument("--windows", default="520x300,1040x600,1920x1080",
+                        help="preview areas to fit into")
+    parser.add_argument("--photo-size", default="7728x5152",
+                        help="photo WIDTHxHEIGHT for the loader (default 40 MP)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    img = synthetic_cutout(width, height)
+    print(f"🖼️ {width}x{height} RGBA cut-out, median of {args.repeat} runs")
+    print(f"{'window':>10} {'before':>10} {'resize':>10} {'composite':>10} {'after':>10}")
+
+    for window in args.windows.split(','):
+        max_width, max_height = (int(v) for v in window.lower().split('x'))
+        before = median_ms(lambda: legacy_preview(img, max_width, max_height), args.repeat)
+        resized = preview.resize_for_preview(img, max_width, max_height)
+        resize = median_ms(lambda: preview.resize_for_preview(img, max_width, max_height),
+                           args.repeat)
+        # Warm cache: what every preview after the first one at this size costs
+        preview.checkerboard(*resized.size)
+        composite = median_ms(
+            lambda: Image.alpha_composite(preview.checkerboard(*resized.size), resized),
+            args.repeat)
+        after = median_ms(lambda: preview.composite_preview(img, max_width, max_height),
+                          args.repeat)
+        print(f"{window:>10} {before:8.1f}ms {resize:8.1f}ms {composite:8.1f}ms {after:8.1f}ms")
+
+    width, height = (int(v) for v in args.photo_size.lower().split('x'))
+    photo = synthetic_cutout(width, height).convert('RGB')
+    print(f"📂 Loading a {width}x{height} photo for the preview")
+    print(f"{'format':>10} {'before':>10} {'after':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext, options in (("jpg", {'quality': 92}), ("tiff", {})):
+            path = os.path.join(tmp, f"photo.{ext}")
+            photo.save(path, **options)
+            before = median_ms(lambda: legacy_load(path), args.repeat)
+            after = median_ms(lambda: preview.load_preview(path), args.repeat)
+            print(f"{ext:>10} {before:8.1f}ms {after:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
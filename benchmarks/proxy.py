@@ -0,0 +1,98 @@
+"""Proxy inference vs full resolution: time per image and IoU of the final alpha
+
+    python -m benchmarks.proxy [--images DIR] [--sizes 2000x1500,4000x3000]
+                               [--proxy 768,1024,1536] [--quality Fast Ultra] [--model u2netp]
+
+Without --images a synthetic photo is generated for each of --sizes. Without
+--model the image's own soft mask stands in for the AI output (the
+synthetic mask, or a plain resize of it at proxy size), so the numbers show
+what proxy mode saves in matting and compositing. With --model the whole
+run_model() call is timed on a real session, inference included.
+
+IoU compares the alpha channel (> 50%) of each proxy cut-out with the
+full-resolution cut-out of the same image.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from aurora import core
+from aurora.batch import list_images
+from aurora.proxy import proxy_dims
+from benchmarks.matting import synthetic_photo
+
+
+def iou(a, b):
+    a = np.asarray(a.getchannel('A')) > 127
+    b = np.asarray(b.getchannel('A')) > 127
+    union = np.count_nonzero(a | b)
+    return np.count_nonzero(a & b) / union if union else 1.0
+
+
+def sample_images(args):
+    if args.images:
+        for path in list_images([args.images]):
+            yield path, core.load_image(path), None
+        return
+    for size in args.sizes.split(','):
+        width, height = (int(v) for v in size.lower().split('x'))
+        img, mask = synthetic_photo(width, height)
+        yield f"synthetic {size}", img, mask
+
+
+def cut_out(img, mask, session, quality, proxy_size):
+    """Cut-out and seconds taken, with the model or with a stand-in mask"""
+    start = time.perf_counter()
+    if session is not None:
+        result = core.run_model(img, session, quality, proxy_size)
+    else:
+        if proxy_size and max(img.size) > proxy_size:
+            mask = mask.resize(proxy_dims(img.size, proxy_size), Image.Resampling.BILINEAR)
+        result = core.cut_out(img, mask, quality)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", help="folder of sample photos (default: synthetic)")
+    parser.add_argument("--sizes", default="2000x1500,4000x3000")
+    parser.add_argument("--proxy", default="768,1024,1536", help="proxy sizes to compare")
+    parser.add_argument("--quality", default="Fast Ultra", choices=list(core.QUALITY_PRESETS))
+    parser.add_argument("--model", help="run this AI model instead of using a stand-in mask")
+    args = parser.parse_args(argv)
+
+    session = core.load_session(args.model) if args.model else None
+    if session is None and args.images:
+        parser.error("--images needs --model, photos have no mask of their own")
+    proxies = [int(v) for v in args.proxy.split(',')]
+
+    # Warm up (model, pymatting's numba kernels) so the first image isn't penalised
+    warm_img, warm_mask = synthetic_photo(320, 240)
+    cut_out(warm_img, warm_mask, session, args.quality, None)
+
+    print(f"{'image':>24} {'proxy':>6} {'time':>8} {'speed-up':>9} {'IoU':>8}")
+    ious = {size: [] for size in proxies}
+    speedups = {size: [] for size in proxies}
+    for name, img, mask in sample_images(args):
+        full, full_time = cut_out(img, mask, session, args.quality, None)
+        print(f"{name:>24} {'full':>6} {full_time:7.2f}s")
+        for size in proxies:
+            result, seconds = cut_out(img, mask, session, args.quality, size)
+            ious[size].append(iou(full, result))
+            speedups[size].append(full_time / seconds)
+            print(f"{'':>24} {size:>6} {seconds:7.2f}s {speedups[size][-1]:8.1f}x "
+                  f"{ious[size][-1]:8.4f}")
+
+    print("📊 Mean over the sample set:")
+    for size in proxies:
+        if ious[size]:
+            print(f"   proxy {size:>5}: {statistics.mean(speedups[size]):5.1f}x faster, "
+                  f"IoU {statistics.mean(ious[size]):.4f} (min {min(ious[size]):.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""INT8 vs FP32 models: mask IoU, time per image, model size and memory
+
+    python -m benchmarks.quantized [--models u2net,u2netp,silueta] [--images DIR]
+                                   [--count 8] [--size 1024x768] [--repeat 3]
+
+Quantizes each model on first use (see aurora.quantize), then runs the FP32
+and INT8 sessions on the same images. IoU compares the masks thresholded at
+50%, MAE is the mean absolute difference in grey levels (0-255). Memory is
+the growth in resident memory from loading the session and running it once,
+read from /proc (shown as n/a elsewhere). Without --images, --count
+synthetic photos are generated.
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import time
+
+import numpy as np
+
+from aurora import core
+from aurora.batch import list_images
+from aurora.quantize import INT8_SUFFIX, model_file, quantize_model
+from benchmarks.matting import synthetic_photo
+
+
+def rss_mb():
+    """Resident memory of this process in MB, None where /proc is missing"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def mask_iou(a, b):
+    a = np.asarray(a) > 127
+    b = np.asarray(b) > 127
+    union = np.count_nonzero(a | b)
+    return np.count_nonzero(a & b) / union if union else 1.0
+
+
+def run_model(model, images, repeat):
+    """Masks, median seconds per image and memory growth of one model"""
+    gc.collect()
+    before = rss_mb()
+    session = core.load_session(model)
+    masks = [core.predict_mask(img, session) for img in images]
+    after = rss_mb()
+    times = []
+    for _ in range(repeat):
+        for img in images:
+            start = time.perf_counter()
+            core.predict_mask(img, session)
+            times.append(time.perf_counter() - start)
+    memory = after - before if before is not None and after is not None else None
+    return masks, statistics.median(times), memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", default="u2net,u2netp,silueta")
+    parser.add_argument("--images", help="folder of test images (default: synthetic)")
+    parser.add_argument("--count", type=int, default=8)
+    parser.add_argument("--size", default="1024x768")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.images:
+        images = [core.load_image(path) for path in list_images([args.images])]
+    else:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+        images = [synthetic_photo(width, height, seed=i)[0] for i in range(args.count)]
+    print(f"🖼️ {len(images)} images • median of {args.repeat} passes")
+    print(f"{'model':>14} {'file':>9} {'memory':>9} {'ms/image':>9} {'speed-up':>9} "
+          f"{'IoU':>7} {'MAE':>6}")
+
+    for model in args.models.split(','):
+        quantized = model + INT8_SUFFIX
+        quantize_model(quantized)
+        reference, fp32_seconds, fp32_memory = run_model(model, images, args.repeat)
+        masks, int8_seconds, int8_memory = run_model(quantized, images, args.repeat)
+
+        ious = [mask_iou(a, b) for a, b in zip(reference, masks)]
+        mae = statistics.mean(
+            float(np.abs(np.asarray(a, np.int16) - np.asarray(b, np.int16)).mean())
+            for a, b in zip(reference, masks))
+        for name, seconds, memory in ((model, fp32_seconds, fp32_memory),
+                                      (quantized, int8_seconds, int8_memory)):
+            size = os.path.getsize(model_file(name)) / 1024 / 1024
+            mem = f"{memory:7.1f}MB" if memory is not None else f"{'n/a':>9}"
+            row = (f"{name:>14} {size:7.1f}MB {mem} {seconds * 1000:9.1f} "
+                   f"{fp32_seconds / seconds:8.2f}x")
+            if name == quantized:
+                row += f" {statistics.mean(ious):7.4f} {mae:6.2f}"
+            print(row)
+        print(f"   {quantized}: IoU min {min(ious):.4f} • "
+              f"{fp32_seconds / int8_seconds:.2f}x the FP32 speed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""HTTP server under load: throughput, client-side p50/p95 and 503s at several concurrency levels
+
+    python -m benchmarks.server [--model u2netp] [--requests 40] [--clients 1,4,8]
+                                [--max-batch 4] [--max-concurrent 8] [--size 1024x768]
+
+Starts aurora.server on a free local port in this process, then fires
+--requests POST /remove calls from N client threads for each --clients
+level. Nothing leaves the machine. The result cache is off so every request
+reaches the model.
+"""
+
+import argparse
+import io
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from aurora import server
+from aurora.metrics import percentile
+from aurora.sessions import SessionCache
+from benchmarks.matting import synthetic_photo
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, method='POST',
+                                     headers={'Content-Type': 'image/jpeg'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="u2netp")
+    parser.add_argument("--quality", default="Standard")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--clients", default="1,4,8")
+    parser.add_argument("--max-batch", type=int, default=server.DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-concurrent", type=int, default=server.DEFAULT_MAX_CONCURRENT)
+    parser.add_argument("--size", default="1024x768")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    buf = io.BytesIO()
+    synthetic_photo(width, height)[0].save(buf, "JPEG", quality=90)
+    body = buf.getvalue()
+
+    sessions = SessionCache()
+    sessions.get(args.model)
+    httpd = server.AuroraServer(('127.0.0.1', 0), sessions=sessions,
+                                max_concurrent=args.max_concurrent, max_batch=args.max_batch,
+                                quiet=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = (f"http://127.0.0.1:{httpd.server_address[1]}/remove"
+           f"?model={args.model}&quality={args.quality}")
+    post(url, body)   # warm-up
+
+    print(f"🌐 {args.requests} requests per level • {width}x{height} JPEG • {args.model} • "
+          f"max batch {args.max_batch} • max concurrent {args.max_concurrent}")
+    print(f"{'clients':>8} {'req/s':>8} {'p50':>8} {'p95':>8} {'503s':>6} {'batch':>6}")
+    try:
+        for clients in (int(v) for v in args.clients.split(',')):
+            batches, items = httpd.batcher.batches, httpd.batcher.items
+            start = time.perf_counter()
+            with ThreadPoolExecutor(clients) as pool:
+                results = list(pool.map(lambda _: post(url, body), range(args.requests)))
+            elapsed = time.perf_counter() - start
+            ok = [seconds for status, seconds in results if status == 200]
+            busy = sum(1 for status, _ in results if status == 503)
+            batch_size = ((httpd.batcher.items - items) / (httpd.batcher.batches - batches)
+                          if httpd.batcher.batches > batches else 0.0)
+            print(f"{clients:>8} {len(ok) / elapsed:8.2f} {percentile(ok, 50):7.3f}s "
+                  f"{percentile(ok, 95):7.3f}s {busy:>6} {batch_size:6.2f}")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    if ok:
+        print(f"   mean latency at the last level: {statistics.mean(ok):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
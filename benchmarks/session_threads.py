@@ -0,0 +1,97 @@
+"""ONNX Runtime thread sweep: model runs/s per thread count, graph optimization and parallel sessions
+
+    python -m benchmarks.session_threads [--models u2net,u2netp] [--threads 1,2,4]
+                                         [--graph-opts all,basic] [--sessions 1,2]
+                                         [--runs 10]
+
+Times the bare model run (session.run on a preprocessed 320x320 input) so
+the numbers show ONNX Runtime alone. With --sessions N, N sessions run side
+by side on their own threads, like N batch workers, and the total rate is
+reported; threads x sessions above the core count shows the oversubscription.
+Prints the best configuration per model at the end. --threads defaults to
+1, 2, 4... up to the core count, plus 0 (ONNX Runtime's automatic choice).
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from aurora import core
+from aurora.inference import preprocess
+from aurora.runtime import RuntimeOptions
+from benchmarks.matting import synthetic_photo
+
+
+def default_threads():
+    cores = os.cpu_count() or 1
+    counts = [0]
+    n = 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    counts.append(cores)
+    return ",".join(str(n) for n in counts)
+
+
+def run_rate(model, runtime, sessions, runs, tensor):
+    """Model runs per second over all sessions running side by side"""
+    loaded = [core.load_session(model, runtime).inner_session for _ in range(sessions)]
+    feeds = [{s.get_inputs()[0].name: tensor} for s in loaded]
+    for s, feed in zip(loaded, feeds):
+        s.run(None, feed)   # warm-up
+
+    def work(s, feed, times):
+        for _ in range(runs):
+            start = time.perf_counter()
+            s.run(None, feed)
+            times.append(time.perf_counter() - start)
+
+    times = [[] for _ in loaded]
+    threads = [threading.Thread(target=work, args=(s, feed, t))
+               for s, feed, t in zip(loaded, feeds, times)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latency = statistics.median(x for t in times for x in t)
+    return sessions * runs / elapsed, latency
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", default="u2net,u2netp")
+    parser.add_argument("--threads", default=default_threads())
+    parser.add_argument("--graph-opts", default="all")
+    parser.add_argument("--sessions", default="1")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--no-arena", action="store_true")
+    args = parser.parse_args(argv)
+
+    tensor = preprocess([synthetic_photo(640, 480)[0]])
+    print(f"🧵 {os.cpu_count()} cores • {args.runs} runs per session")
+    print(f"{'model':>8} {'threads':>8} {'graph':>9} {'sessions':>9} {'runs/s':>8} {'median':>9}")
+
+    for model in args.models.split(','):
+        results = []
+        for sessions in (int(v) for v in args.sessions.split(',')):
+            for graph in args.graph_opts.split(','):
+                for threads in (int(v) for v in args.threads.split(',')):
+                    runtime = RuntimeOptions(intra_threads=threads,
+                                             inter_threads=1 if threads else 0,
+                                             graph_optimization=graph,
+                                             cpu_arena=not args.no_arena)
+                    rate, latency = run_rate(model, runtime, sessions, args.runs, tensor)
+                    results.append((rate, threads, graph, sessions))
+                    print(f"{model:>8} {threads or 'auto':>8} {graph:>9} {sessions:>9} "
+                          f"{rate:8.2f} {latency * 1000:7.1f}ms")
+        rate, threads, graph, sessions = max(results)
+        print(f"🏆 {model}: --threads {threads} --graph-opt {graph} with {sessions} "
+              f"session(s) • {rate:.2f} runs/s")
+
+
+if __name__ == "__main__":
+    main()
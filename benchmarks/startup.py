@@ -0,0 +1,76 @@
+"""Cold-start time: to the first frame of the window and to the first inference
+
+    python -m benchmarks.startup [--model u2netp] [--repeat 3] [--gui]
+
+Every run is a fresh Python process, so nothing is cached in sys.modules.
+'lazy' imports what the app imports before its window can be drawn (the
+engine libraries are left to the background warm-up), then warms up and
+runs one mask like the app does. 'eager' imports rembg up front as the app
+used to. With --gui (needs a display) the real app is also started with
+--startup-probe, which reports its own first frame, engine-ready and first
+inference times.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   'Aurora_bg_remover.py.py')
+
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+if sys.argv[1] == 'eager':
+    import rembg
+from PIL import Image
+from aurora import core, preview
+from aurora.batch import BatchSettings
+from aurora.sessions import SessionCache
+from aurora.watch import watch_folder
+first_frame = time.perf_counter() - start
+core.import_engine()
+session = core.load_session(sys.argv[2])
+core.predict_mask(Image.new('RGB', (640, 480), (90, 120, 200)), session)
+print(json.dumps({'first_frame': first_frame, 'first_inference': time.perf_counter() - start}))
+'''
+
+
+def run(argv):
+    out = subprocess.run([sys.executable] + argv, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def median(runs, key):
+    return statistics.median(r[key] for r in runs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="u2netp")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--gui", action="store_true", help="also time the real app (needs a display)")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 {args.model} • median of {args.repeat} fresh processes")
+    print(f"{'mode':>6} {'first frame':>12} {'first inference':>16}")
+    for mode in ('eager', 'lazy'):
+        runs = [run(['-c', CHILD, mode, args.model]) for _ in range(args.repeat)]
+        print(f"{mode:>6} {median(runs, 'first_frame'):11.2f}s {median(runs, 'first_inference'):15.2f}s")
+
+    if not args.gui:
+        return
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        print("⏭️ No display, skipping the GUI run")
+        return
+    runs = [run([APP, '--startup-probe']) for _ in range(args.repeat)]
+    print(f"🖥️ app: first frame {median(runs, 'first_frame'):.2f}s • "
+          f"engine ready {median(runs, 'engine_ready'):.2f}s • "
+          f"first inference {median(runs, 'first_inference'):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
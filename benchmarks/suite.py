@@ -0,0 +1,277 @@
+"""Reproducible throughput suite: synthetic corpus, single-image and batch paths, JSON results
+
+    python -m benchmarks.suite [--sizes 640x480,1600x1200] [--input-formats jpg,png,webp]
+                               [--complexities simple,hair,soft] [--models stub]
+                               [--qualities Standard,Fast Ultra] [--formats png,webp]
+                               [--paths single,batch] [--stub-ms 0] [--out FILE]
+                               [--compare OLD.json] [--corpus DIR]
+
+The corpus comes from fixed seeds, so every run and every commit sees the
+same pixels: a cool gradient background with a warm subject whose outline
+is simple (an ellipse), hair (hundreds of fine strands) or soft (a wide
+feathered edge), saved in each input format. Model "stub" stands in for
+U²-Net without any model file or download: it makes a mask from the
+subject's colour at the models' 320x320 input size and sleeps --stub-ms per
+image. Real model names load the installed models.
+
+Each model x quality x output format x path runs in a fresh process, so the
+peak RSS reported is its own (VmHWM, Linux/macOS only). 'single' takes each
+image through the app's single-image steps (read, decode, mask, cut-out,
+preview, save), 'batch' through iter_batch with one worker. Images/s,
+per-stage percentiles from aurora.metrics and peak RSS are written to --out
+as JSON along with the commit and machine; --compare prints the images/s
+ratio against an earlier results file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+from importlib import metadata
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from aurora import core, preview
+from aurora.batch import BatchSettings, finish_image, iter_batch, list_images
+from aurora.metrics import REGISTRY
+from aurora.sessions import SessionCache
+from benchmarks.large_image import peak_rss_mb
+
+
+COMPLEXITIES = ("simple", "hair", "soft")
+# Results files this script writes, bumped when their layout changes
+RESULTS_VERSION = 1
+
+
+def subject_alpha(width, height, complexity, rng):
+    """Ground-truth alpha of the synthetic subject, float32 in 0..1"""
+    alpha = Image.new('L', (width, height), 0)
+    draw = ImageDraw.Draw(alpha)
+    cx, cy, a, b = width / 2, height * 0.55, width * 0.25, height * 0.35
+    draw.ellipse((cx - a, cy - b, cx + a, cy + b), fill=255)
+    scale = min(width, height)
+    if complexity == "hair":
+        # Strands growing out of the top half, a few segments each with some wobble
+        for _ in range(400):
+            angle = rng.uniform(-0.9 * np.pi, -0.1 * np.pi)
+            x, y = cx + a * np.cos(angle), cy + b * np.sin(angle)
+            points = [(x, y)]
+            for _ in range(4):
+                angle += rng.normal(0, 0.2)
+                step = rng.uniform(0.01, 0.04) * scale
+                x, y = x + step * np.cos(angle), y + step * np.sin(angle)
+                points.append((x, y))
+            draw.line(points, fill=int(rng.integers(160, 256)), width=int(rng.integers(1, 3)))
+    radius = {"simple": 1.5, "hair": 0.6, "soft": scale * 0.04}[complexity]
+    alpha = alpha.filter(ImageFilter.GaussianBlur(radius))
+    return np.asarray(alpha, dtype=np.float32) / 255
+
+
+def synthetic_image(width, height, complexity, seed=0):
+    """RGB photo of a warm, textured subject over a cool gradient"""
+    rng = np.random.default_rng(seed)
+    alpha = subject_alpha(width, height, complexity, rng)[..., None]
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    background = np.stack([40 + 60 * x / width, 90 + 60 * y / height, 200 - 40 * x / width],
+                          axis=-1)
+    subject = np.stack([210 + 30 * np.sin(x / 17), 120 + 50 * np.cos(y / 23),
+                        40 + 20 * np.sin((x + y) / 11)], axis=-1)
+    rgb = background * (1 - alpha) + subject * alpha + rng.normal(0, 6, background.shape)
+    return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), 'RGB')
+
+
+def write_corpus(directory, sizes, input_formats, complexities):
+    """Write the corpus images that aren't there yet, returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for n, (width, height) in enumerate(sizes):
+        for m, complexity in enumerate(complexities):
+            img = None
+            for input_format in input_formats:
+                # The format in the stem too, so outputs don't share names
+                path = os.path.join(directory, f"{complexity}_{width}x{height}_{input_format}."
+                                               f"{input_format}")
+                if not os.path.exists(path):
+                    if img is None:
+                        img = synthetic_image(width, height, complexity, seed=n * 10 + m)
+                    img.save(path, core.PIL_FORMATS[input_format], quality=92)
+                paths.append(path)
+    return paths
+
+
+class StubSession:
+    """Offline stand-in for a rembg session: a colour-key mask at the models' input size"""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def predict(self, img, *args, **kwargs):
+        small = np.asarray(img.convert('RGB').resize((320, 320), Image.Resampling.BILINEAR),
+                           dtype=np.float32)
+        mask = np.clip((small[..., 0] - small[..., 2]) / 120 + 0.5, 0, 1)
+        if self.delay:
+            time.sleep(self.delay)
+        mask = Image.fromarray((mask * 255).astype(np.uint8), 'L')
+        return [mask.resize(img.size, Image.Resampling.LANCZOS)]
+
+
+def load_session(model_name, runtime=None, delay=0.0):
+    if model_name == "stub":
+        return StubSession(delay)
+    return core.load_session(model_name, runtime)
+
+
+def run_single(file_path, output_dir, session, settings):
+    """The app's single-image steps, with the output saved like its Save button"""
+    img = core.decode_image(core.read_file(file_path), file_path)
+    mask = core.predict_mask(img, session, settings.proxy_size)
+    img = finish_image(core.cut_out(img, mask, settings.quality), settings)
+    preview.composite_preview(img)
+    save_path = os.path.join(output_dir, core.output_name(file_path, settings.output_format))
+    core.save_image(img, save_path, settings.output_format, settings.encoder_profile)
+
+
+def child(config):
+    files = list_images([config['corpus']])
+    settings = BatchSettings(model=config['model'], quality=config['quality'],
+                             output_format=config['format'])
+    sessions = SessionCache(loader=partial(load_session, delay=config['stub_ms'] / 1000))
+    start = time.perf_counter()
+    session = sessions.get(config['model'])
+    load_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # One untimed image first, so lazy imports and first-run allocations don't count
+        run_single(files[0], output_dir, session, settings)
+        REGISTRY.reset()
+        start = time.perf_counter()
+        if config['path'] == 'single':
+            for file_path in files:
+                run_single(file_path, output_dir, session, settings)
+            errors = 0
+        else:
+            results = list(iter_batch(files, output_dir, settings, sessions=sessions))
+            errors = sum(not result.ok for result in results)
+        seconds = time.perf_counter() - start
+
+    stages = {name: {key: value for key, value in data.items() if key != 'buckets'}
+              for name, data in REGISTRY.snapshot()['stages'].items()}
+    print(json.dumps({'images': len(files), 'errors': errors, 'seconds': round(seconds, 4),
+                      'images_per_sec': round(len(files) / seconds, 3),
+                      'load_seconds': round(load_seconds, 4),
+                      'peak_rss_mb': round(peak_rss_mb(), 1), 'stages': stages}))
+
+
+def measure(config):
+    out = subprocess.run([sys.executable, '-m', 'benchmarks.suite', '--child', json.dumps(config)],
+                         capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "child failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def machine():
+    versions = {}
+    for package in ('pillow', 'numpy', 'scipy', 'onnxruntime', 'rembg'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'python': platform.python_version(),
+            'packages': versions}
+
+
+def result_key(result):
+    return (result['path'], result['model'], result['quality'], result['format'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="640x480,1600x1200")
+    parser.add_argument("--input-formats", default="jpg,png,webp")
+    parser.add_argument("--complexities", default=",".join(COMPLEXITIES))
+    parser.add_argument("--models", default="stub",
+                        help="'stub' needs no model files, or real model names")
+    parser.add_argument("--qualities", default="Standard,Fast Ultra")
+    parser.add_argument("--formats", default="png,webp", help="output formats")
+    parser.add_argument("--paths", default="single,batch")
+    parser.add_argument("--stub-ms", type=float, default=0.0,
+                        help="simulated model time per image of the stub session")
+    parser.add_argument("--corpus", help="folder to keep the corpus in (default: temporary)")
+    parser.add_argument("--out", help="results file (default: suite_<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare images/s with")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(json.loads(args.child))
+        return
+
+    sizes = [tuple(int(v) for v in size.lower().split('x')) for size in args.sizes.split(',')]
+    commit = git_commit()
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus or os.path.join(tmp, 'corpus')
+        paths = write_corpus(corpus, sizes, args.input_formats.split(','),
+                             args.complexities.split(','))
+        print(f"🧪 {len(paths)} corpus images in {corpus} • commit {commit or 'unknown'}")
+        print(f"{'path':>6} {'model':>8} {'quality':>10} {'format':>6} {'images/s':>9} "
+              f"{'p95 infer':>10} {'p95 matte':>10} {'p95 encode':>11} {'peak':>8}")
+        results = []
+        for path in args.paths.split(','):
+            for model in args.models.split(','):
+                for quality in args.qualities.split(','):
+                    for output_format in args.formats.split(','):
+                        config = {'path': path, 'model': model, 'quality': quality,
+                                  'format': output_format, 'stub_ms': args.stub_ms,
+                                  'corpus': corpus}
+                        r = measure(config)
+                        results.append(dict(config, **r))
+                        p95 = {name: data['p95_seconds'] * 1000
+                               for name, data in r['stages'].items()}
+                        print(f"{path:>6} {model:>8} {quality:>10} {output_format:>6} "
+                              f"{r['images_per_sec']:9.2f} {p95.get('inference', 0):8.1f}ms "
+                              f"{p95.get('matting', 0):8.1f}ms {p95.get('encode', 0):9.1f}ms "
+                              f"{r['peak_rss_mb']:6.0f}MB")
+
+    for result in results:
+        del result['corpus']
+    report = {'version': RESULTS_VERSION, 'commit': commit,
+              'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'machine': machine(),
+              'corpus': {'sizes': args.sizes, 'input_formats': args.input_formats,
+                         'complexities': args.complexities, 'images': len(paths)},
+              'stub_ms': args.stub_ms, 'results': results}
+    out = args.out or f"suite_{(commit or 'unknown')[:12]}.json"
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = {result_key(result): result for result in json.load(f)['results']}
+        print(f"📊 images/s against {args.compare}:")
+        for result in results:
+            before = old.get(result_key(result))
+            if before:
+                print(f"   {' / '.join(result_key(result))}: {before['images_per_sec']:.2f} -> "
+                      f"{result['images_per_sec']:.2f} "
+                      f"({result['images_per_sec'] / before['images_per_sec']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()